@@ -0,0 +1,317 @@
+# benchmark.py
+"""Engine and API benchmarks.
+
+    python benchmark.py --output results.json                 # run and save
+    python benchmark.py --baseline benchmark_baseline.json    # run and compare
+    python benchmark.py --baseline benchmark_baseline.json --update-baseline
+
+Results are a flat {metric: value} map. Absolute times depend on the
+machine, so every time and rate is also reported relative to a reference
+workload (python-chess move generation) timed in slices between the steps
+of the same run, as <metric>.vs_reference. Comparing against a baseline
+fails (exit status 1) when a node count grows (they are deterministic) or
+a .vs_reference value is worse than the baseline by more than the
+tolerance: relative times must not grow, relative rates (_per_sec) must
+not shrink. Absolute times are printed but not compared.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+import chess
+import chess.pgn
+
+# The benchmarks never touch the games database
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+import app as app_module
+from app import alpha_beta, iterative_deepening, minimax
+from evaluation import EvalBoard, evaluate_board
+from search_context import SearchContext
+from transposition import TranspositionTable
+
+DEFAULT_PGN = os.path.join(os.path.dirname(__file__), '..', 'node_modules', 'chess.js', 'benchmarks', 'benchmark.pgn')
+DEFAULT_TOLERANCE = 0.25
+
+TACTICAL_FENS = [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",  # Scholar's mate threat
+    "r1b1kb1r/pppp1ppp/5q2/4n3/3KP3/2N3PN/PPP4P/R1BQ1B1R b kq - 0 1",
+    "2rq1rk1/pp1bppbp/2np1np1/8/3NP3/1BN1BP2/PPPQ2PP/2KR3R b - - 0 11",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+]
+
+ENDGAME_FENS = [
+    "8/8/8/4k3/8/8/8/R3K3 w - - 0 1",
+    "8/5k2/8/8/8/8/3P4/4K3 w - - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1",
+]
+
+
+def load_positions(pgn_path=DEFAULT_PGN, games=10, plies=(12, 30)):
+    """FENs from the first games of a PGN file, at fixed plies, followed
+    by the tactical and endgame positions"""
+    fens = []
+    if pgn_path and os.path.exists(pgn_path):
+        with open(pgn_path) as handle:
+            for _ in range(games):
+                game = chess.pgn.read_game(handle)
+                if game is None:
+                    break
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves(), start=1):
+                    board.push(move)
+                    if ply in plies and not board.is_game_over():
+                        fens.append(board.fen())
+    return fens + TACTICAL_FENS + ENDGAME_FENS
+
+
+class ReferenceClock:
+    """Times a fixed python-chess workload (legal moves two plies deep) in
+    slices, one position per tick, between the steps of a benchmark. The
+    machine's speed can change part-way through a run, so the reference
+    is sampled alongside the work it scales rather than once up front."""
+
+    def __init__(self, fens):
+        self.boards = [chess.Board(fen) for fen in fens]
+        self.ticks = 0
+        self.seconds = 0.0
+
+    def tick(self):
+        board = self.boards[self.ticks % len(self.boards)]
+        start = time.perf_counter()
+        for move in board.legal_moves:
+            board.push(move)
+            board.legal_moves.count()
+            board.pop()
+        self.seconds += time.perf_counter() - start
+        self.ticks += 1
+
+    def time_ms(self):
+        """Estimated time for one pass over every position"""
+        return self.seconds / self.ticks * len(self.boards) * 1000
+
+
+def relative_to_reference(metrics, reference):
+    """<metric>.vs_reference for every time and rate: times divided by the
+    reference time, rates multiplied by it"""
+    relative = {}
+    for name, value in metrics.items():
+        if higher_is_better(name):
+            relative[f'{name}.vs_reference'] = value * reference
+        elif name.endswith(('_ms', '_us')):
+            relative[f'{name}.vs_reference'] = value / reference
+    return relative
+
+
+def bench_evaluate(fens, repeat=200, clock=None):
+    boards = [EvalBoard(fen) for fen in fens]
+    elapsed = 0.0
+    for _ in range(repeat):
+        if clock is not None:
+            clock.tick()
+        start = time.perf_counter()
+        for board in boards:
+            evaluate_board(board)
+        elapsed += time.perf_counter() - start
+    calls = repeat * len(boards)
+    return {
+        'evaluate_board.calls_per_sec': calls / elapsed,
+        'evaluate_board.call_us': elapsed / calls * 1e6,
+    }
+
+
+def bench_minimax(fens, max_depth=2, clock=None):
+    results = {}
+    for depth in range(1, max_depth + 1):
+        nodes, elapsed = 0, 0.0
+        for fen in fens:
+            if clock is not None:
+                clock.tick()
+            board = EvalBoard(fen)
+            ctx = SearchContext()
+            start = time.perf_counter()
+            minimax(board, depth, board.turn == chess.WHITE, ctx=ctx)
+            elapsed += time.perf_counter() - start
+            nodes += ctx.nodes
+        results[f'minimax.depth{depth}.nodes'] = nodes
+        results[f'minimax.depth{depth}.time_ms'] = elapsed * 1000
+    results['minimax.nodes_per_sec'] = nodes / elapsed
+    return results
+
+
+def bench_search(fens, engine, max_depth=4, clock=None):
+    """Iterative deepening per position; time-to-depth is cumulative"""
+    nodes = [0] * (max_depth + 1)
+    seconds = [0.0] * (max_depth + 1)
+    for fen in fens:
+        if clock is not None:
+            clock.tick()
+        board = EvalBoard(fen)
+        ctx = SearchContext()
+        start = time.perf_counter()
+
+        def record(depth, move, score, ctx):
+            nodes[depth] += ctx.nodes
+            seconds[depth] += time.perf_counter() - start
+
+        move, _, completed = iterative_deepening(board, max_depth, tt=TranspositionTable(), ctx=ctx,
+                                                 engine=engine, on_iteration=record)
+        # Finished early (mate found or no moves): count it at every depth
+        for depth in range(completed + 1, max_depth + 1):
+            record(depth, move, None, ctx)
+    results = {}
+    for depth in range(1, max_depth + 1):
+        results[f'{engine}.depth{depth}.nodes'] = nodes[depth]
+        results[f'{engine}.depth{depth}.time_ms'] = seconds[depth] * 1000
+    results[f'{engine}.nodes_per_sec'] = nodes[max_depth] / seconds[max_depth]
+    return results
+
+
+def bench_alpha_beta(fens, depth=3, clock=None):
+    """Plain fixed-depth alpha_beta, as /api/move runs it"""
+    nodes, elapsed = 0, 0.0
+    for fen in fens:
+        if clock is not None:
+            clock.tick()
+        board = EvalBoard(fen)
+        ctx = SearchContext()
+        start = time.perf_counter()
+        alpha_beta(board, depth, -math.inf, math.inf, board.turn == chess.WHITE,
+                   tt=TranspositionTable(), ctx=ctx)
+        elapsed += time.perf_counter() - start
+        nodes += ctx.nodes
+    return {
+        f'alpha_beta.depth{depth}.nodes': nodes,
+        f'alpha_beta.depth{depth}.time_ms': elapsed * 1000,
+        'alpha_beta.nodes_per_sec': nodes / elapsed,
+    }
+
+
+def bench_api(fens, engine='alphabeta', depth=3, clock=None):
+    """/api/move latency through Flask's test client, with the result cache cleared"""
+    client = app_module.app.test_client()
+    latencies = []
+    for fen in fens:
+        if clock is not None:
+            clock.tick()
+        app_module.result_cache.clear()
+        start = time.perf_counter()
+        response = client.post('/api/move', json={'fen': fen, 'engine': engine, 'depth': depth, 'use_book': False})
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'/api/move failed for {fen}: {response.status_code}')
+    latencies.sort()
+    return {
+        f'api.{engine}.depth{depth}.mean_ms': statistics.mean(latencies),
+        f'api.{engine}.depth{depth}.p50_ms': latencies[len(latencies) // 2],
+        f'api.{engine}.depth{depth}.p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def run(fens, search_depth=4, minimax_depth=2, api_depth=3, eval_repeat=200):
+    sections = [
+        lambda clock: bench_evaluate(fens, eval_repeat, clock),
+        lambda clock: bench_minimax(fens, minimax_depth, clock),
+        lambda clock: bench_alpha_beta(fens, api_depth, clock),
+        lambda clock: bench_search(fens, 'alphabeta', search_depth, clock),
+        lambda clock: bench_search(fens, 'pvs', search_depth, clock),
+        lambda clock: bench_api(fens, 'alphabeta', api_depth, clock),
+    ]
+    metrics, references = {}, []
+    for section in sections:
+        clock = ReferenceClock(fens)
+        section_metrics = section(clock)
+        references.append(clock.time_ms())
+        metrics.update(section_metrics)
+        metrics.update(relative_to_reference(section_metrics, references[-1]))
+    metrics['reference.time_ms'] = statistics.median(references)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'python_chess': chess.__version__,
+            'machine': platform.machine(),
+            'positions': len(fens),
+            'tablebases': app_module.tablebases is not None,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'metrics': metrics,
+    }
+
+
+def higher_is_better(name):
+    return '_per_sec' in name
+
+
+def compare(metrics, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Regressions against the baseline, as (name, baseline value, current
+    value) tuples: node counts that grew at all, and .vs_reference metrics
+    worse by more than tolerance"""
+    regressions = []
+    for name, expected in sorted(baseline.items()):
+        actual = metrics.get(name)
+        if actual is None or not expected:
+            continue
+        if name.endswith('.nodes'):
+            allowed = 0.0
+        elif name.endswith('.vs_reference'):
+            allowed = tolerance
+        else:
+            continue
+        change = (actual - expected) / expected
+        if higher_is_better(name):
+            change = -change
+        if change > allowed:
+            regressions.append((name, expected, actual))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the engines and /api/move')
+    parser.add_argument('--pgn', default=DEFAULT_PGN, help='PGN file to take positions from')
+    parser.add_argument('--games', type=int, default=10, help='games to read from the PGN')
+    parser.add_argument('--search-depth', type=int, default=4)
+    parser.add_argument('--minimax-depth', type=int, default=2)
+    parser.add_argument('--api-depth', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='baseline results to compare against')
+    parser.add_argument('--update-baseline', action='store_true', help='overwrite the baseline with these results')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown relative to the reference before a metric counts as a regression')
+    args = parser.parse_args()
+
+    fens = load_positions(args.pgn, args.games)
+    results = run(fens, args.search_depth, args.minimax_depth, args.api_depth)
+    for name, value in sorted(results['metrics'].items()):
+        print(f'{name:40} {value:14.2f}')
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(results['metrics'], baseline['metrics'], args.tolerance)
+    for name, expected, actual in regressions:
+        print(f'REGRESSION {name}: {expected:.2f} -> {actual:.2f}', file=sys.stderr)
+    if regressions:
+        print(f'{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}', file=sys.stderr)
+        return 1
+    print(f'No regressions against {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
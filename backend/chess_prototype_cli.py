@@ -1,11 +1,15 @@
+import uuid
 import requests
 import chess
 
 API_BASE_URL = "http://localhost:5000/api"
 
 
-def request_move(fen, engine="minimax", depth=3):
+def request_move(fen, engine="minimax", depth=3, game_id=None, ponder=False):
     payload = {"fen": fen, "engine": engine, "depth": depth}
+    if game_id is not None:
+        # Lets the server keep tables for the game and ponder on our turn
+        payload.update(game_id=game_id, ponder=ponder)
     response = requests.post(f"{API_BASE_URL}/move", json=payload)
     if response.ok:
         return response.json().get("move")
@@ -41,6 +45,7 @@ def human_vs_engine(depth=3):
     print("Choose your Engine: (alphabeta, minimax)")
     engine = input()
     print("You vs Engine mode")
+    game_id = uuid.uuid4().hex
     board = chess.Board()
     print_board(board)
     while not board.is_game_over():
@@ -57,7 +62,7 @@ def human_vs_engine(depth=3):
                 print("Invalid move format. Try again.")
                 continue
         else:
-            move = request_move(board.fen(), engine, depth)
+            move = request_move(board.fen(), engine, depth, game_id=game_id, ponder=True)
             if move:
                 board.push_uci(move)
                 print(f"Engine plays: {move}")
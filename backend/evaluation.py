@@ -0,0 +1,212 @@
+# evaluation.py
+
+import chess
+
+# Piece values for evaluation
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0,
+}
+
+# Centipawns per square attacked by a knight, bishop, rook or queen
+MOBILITY_WEIGHT = 10
+
+# Score of a checkmate; shorter mates score higher (see evaluate_terminal)
+MATE_SCORE = 1000.0
+
+# Piece-square tables in centipawns, from White's point of view with rank 8
+# first (the simplified evaluation function tables).
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20,
+    ],
+}
+
+
+def _build_square_scores():
+    """Signed centipawn score (material + piece-square) of each piece on each
+    square: SQUARE_SCORES[color][piece_type][square], positive for White."""
+    scores = {}
+    for color in chess.COLORS:
+        tables = [None]
+        for piece_type in chess.PIECE_TYPES:
+            table = PIECE_SQUARE_TABLES[piece_type]
+            value = PIECE_VALUES[piece_type] * 100
+            if color == chess.WHITE:
+                tables.append([value + table[chess.square_mirror(sq)] for sq in chess.SQUARES])
+            else:
+                tables.append([-(value + table[sq]) for sq in chess.SQUARES])
+        scores[color] = tables
+    return scores
+
+
+SQUARE_SCORES = _build_square_scores()
+
+
+def material_score(board):
+    """Material and piece-square score of a board in centipawns, from scratch"""
+    score = 0
+    for color in chess.COLORS:
+        tables = SQUARE_SCORES[color]
+        for piece_type in chess.PIECE_TYPES:
+            table = tables[piece_type]
+            for square in chess.scan_reversed(board.pieces_mask(piece_type, color)):
+                score += table[square]
+    return score
+
+
+def move_delta(board, move):
+    """Change in material_score caused by move; call before pushing it"""
+    if not move:
+        return 0
+    color = board.turn
+    own = SQUARE_SCORES[color]
+    from_square, to_square = move.from_square, move.to_square
+    piece_type = board.piece_type_at(from_square)
+
+    if move.promotion:
+        delta = own[move.promotion][to_square] - own[piece_type][from_square]
+    else:
+        delta = own[piece_type][to_square] - own[piece_type][from_square]
+
+    if board.is_en_passant(move):
+        captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+        delta -= SQUARE_SCORES[not color][chess.PAWN][captured_square]
+    elif board.is_castling(move):
+        rank = chess.square_rank(from_square)
+        if chess.square_file(to_square) > chess.square_file(from_square):
+            rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+        else:
+            rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+        delta += own[chess.ROOK][rook_to] - own[chess.ROOK][rook_from]
+    else:
+        captured = board.piece_type_at(to_square)
+        if captured:
+            delta -= SQUARE_SCORES[not color][captured][to_square]
+    return delta
+
+
+def mobility(board):
+    """Squares attacked by minor and major pieces, White minus Black.
+
+    Counted from attack bitboards, so it does not depend on whose turn it
+    is and does not generate legal moves.
+    """
+    score = 0
+    pieces = board.knights | board.bishops | board.rooks | board.queens
+    for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        own = board.occupied_co[color]
+        not_own = ~own
+        for square in chess.scan_reversed(pieces & own):
+            score += sign * chess.popcount(board.attacks_mask(square) & not_own)
+    return score
+
+
+class EvalBoard(chess.Board):
+    """chess.Board that keeps its material and piece-square score up to date
+    across push/pop, so leaf evaluation does not rescan the board."""
+
+    def clear_stack(self):
+        super().clear_stack()
+        self.score = material_score(self)
+        self.score_stack = []
+
+    def push(self, move):
+        self.score_stack.append(self.score)
+        self.score += move_delta(self, move)
+        super().push(move)
+
+    def pop(self):
+        move = super().pop()
+        self.score = self.score_stack.pop() if self.score_stack else material_score(self)
+        return move
+
+    def set_piece_at(self, square, piece, promoted=False):
+        super().set_piece_at(square, piece, promoted)
+        self.score = material_score(self)
+
+    def remove_piece_at(self, square):
+        piece = super().remove_piece_at(square)
+        self.score = material_score(self)
+        return piece
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board.score = material_score(board)
+        board.score_stack = []
+        return board
+
+
+def evaluate_board(board):
+    """Evaluate board position - positive favors white, negative favors black"""
+    material = board.score if isinstance(board, EvalBoard) else material_score(board)
+    return (material + MOBILITY_WEIGHT * mobility(board)) / 100.0
+
+
+def evaluate_terminal(board):
+    """Score of a finished game: mate (sooner is better) or draw"""
+    if board.is_checkmate():
+        score = MATE_SCORE - board.ply()
+        return -score if board.turn == chess.WHITE else score
+    return 0.0
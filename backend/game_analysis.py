@@ -0,0 +1,86 @@
+# game_analysis.py
+"""Per-move engine analysis of saved games.
+
+analyze_game replays a game and scores every position with a search
+function, keeping one transposition table for the whole game so each
+search starts from what the previous positions taught it. Scores are from
+White's point of view; a move's loss is how much the score dropped for the
+side that played it.
+"""
+
+import chess
+
+from evaluation import EvalBoard, evaluate_terminal
+from transposition import TranspositionTable
+
+# Pawns a move must lose to be flagged, largest first
+CLASSIFICATIONS = [(3.0, 'blunder'), (1.0, 'mistake'), (0.5, 'inaccuracy')]
+
+# Scores are clamped to this many pawns before losses are taken, so a
+# won position that stays won is not a blunder
+LOSS_CLAMP = 10.0
+
+
+def classify(loss):
+    for threshold, name in CLASSIFICATIONS:
+        if loss >= threshold:
+            return name
+    return None
+
+
+def _clamp(score):
+    return max(-LOSS_CLAMP, min(LOSS_CLAMP, score))
+
+
+def analyze_game(moves, depth, search, tt_size_mb=16):
+    """Analysis rows for every position of a game, the start position included.
+
+    search(board, depth, tt) returns (best move, White-relative score).
+    Each row has the ply, the move that led to the position, its score,
+    the engine's best move there, and the loss and classification of the
+    move played.
+    """
+    board = EvalBoard()
+    tt = TranspositionTable(tt_size_mb)
+    rows = []
+    previous = None
+    for ply in range(len(moves) + 1):
+        if ply:
+            board.push(moves[ply - 1])
+        if board.is_game_over():
+            best_move, score = None, evaluate_terminal(board)
+        else:
+            tt.new_search()
+            best_move, score = search(board, depth, tt)
+        row = {
+            'ply': ply,
+            'move': moves[ply - 1].uci() if ply else None,
+            'score': score,
+            'best_move': best_move.uci() if best_move else None,
+            'loss': None,
+            'classification': None,
+        }
+        if ply:
+            # The side that just moved is the one not to move now
+            sign = 1 if board.turn == chess.BLACK else -1
+            loss = max(0.0, sign * (_clamp(previous) - _clamp(score)))
+            row['loss'] = round(loss, 2)
+            row['classification'] = classify(loss)
+        rows.append(row)
+        previous = score
+    return rows
+
+
+def summarize(rows):
+    """Per side: moves played, average loss and how many moves of each class"""
+    summary = {}
+    for side in ('white', 'black'):
+        # Games start from the initial position, so White plays the odd plies
+        played = [row for row in rows if row['ply'] and (row['ply'] % 2 == 1) == (side == 'white')]
+        summary[side] = {
+            'moves': len(played),
+            'average_loss': round(sum(row['loss'] for row in played) / len(played), 2) if played else None,
+            'counts': {name: sum(1 for row in played if row['classification'] == name)
+                       for _, name in CLASSIFICATIONS},
+        }
+    return summary
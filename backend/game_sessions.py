@@ -0,0 +1,97 @@
+# game_sessions.py
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from evaluation import EvalBoard
+from transposition import TranspositionTable
+
+
+class GameSession:
+    """A game kept on the server: board with full move history, search
+    settings and the game's own transposition table"""
+
+    def __init__(self, fen=None, settings=None, tt_size_mb=16):
+        self.id = uuid.uuid4().hex
+        self.board = EvalBoard(fen) if fen else EvalBoard()
+        self.settings = settings or {}
+        self.tt = TranspositionTable(tt_size_mb)
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    def is_over(self):
+        """Game over, counting threefold repetition and the fifty-move rule
+        as draws once they have happened"""
+        board = self.board
+        return board.is_game_over() or board.is_repetition(3) or board.is_fifty_moves()
+
+    def status(self):
+        """Game status; unlike a bare FEN, the history lets repetitions count"""
+        board = self.board
+        over = self.is_over()
+        outcome = board.outcome()
+        return {
+            'is_checkmate': board.is_checkmate(),
+            'is_stalemate': board.is_stalemate(),
+            'is_check': board.is_check(),
+            'is_repetition': board.is_repetition(3),
+            'is_game_over': over,
+            'result': (outcome.result() if outcome is not None else '1/2-1/2') if over else None,
+        }
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'fen': self.board.fen(),
+            'moves': [move.uci() for move in self.board.move_stack],
+            'status': self.status(),
+        }
+
+
+class SessionStore:
+    """Bounded map of game sessions. Sessions idle for longer than
+    idle_timeout seconds are dropped, and when the store is full the least
+    recently used session makes room for a new one."""
+
+    def __init__(self, max_sessions=256, idle_timeout=1800, tt_size_mb=16):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.tt_size_mb = tt_size_mb
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def create(self, fen=None, settings=None):
+        session = GameSession(fen, settings, self.tt_size_mb)
+        with self.lock:
+            self._evict_idle()
+            self.sessions[session.id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self.lock:
+            self._evict_idle()
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id):
+        with self.lock:
+            return self.sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        # Least recently used first, so stop at the first live session
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            del self.sessions[session_id]
@@ -0,0 +1,83 @@
+# game_writer.py
+
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriterClosed(Exception):
+    """Raised when enqueueing after close()"""
+
+
+class GameWriter:
+    """Write-behind buffer for saved games.
+
+    enqueue() only appends to a queue; a background thread hands the rows
+    to write_rows in batches of up to batch_size, at least every
+    flush_interval seconds. flush() waits until everything queued so far
+    is written, close() flushes and stops the thread.
+    """
+
+    def __init__(self, write_rows, batch_size=100, flush_interval=1.0):
+        self.write_rows = write_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='game-writer', daemon=True)
+        self.thread.start()
+
+    def enqueue(self, row):
+        if self.closed:
+            raise WriterClosed()
+        self.queue.put(row)
+
+    def flush(self, timeout=None):
+        """Block until all rows queued before this call are written"""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch, markers, stop = self._collect()
+            if batch:
+                try:
+                    self.write_rows(batch)
+                except Exception:
+                    logger.exception('Failed to write %d games', len(batch))
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def _collect(self):
+        """Wait for the next batch: up to batch_size rows, or whatever
+        arrived within flush_interval of the first one"""
+        batch, markers = [], []
+        item = self.queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is None:
+                return batch, markers, True
+            if isinstance(item, threading.Event):
+                # A flush() marker: write what we have now
+                markers.append(item)
+                return batch, markers, False
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, markers, False
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return batch, markers, False
@@ -0,0 +1,166 @@
+# move_encoding.py
+"""Compact storage for game move lists.
+
+Each move is packed into 16 bits: from square (bits 0-5), to square
+(bits 6-11) and promotion piece (bits 12-14), written little-endian.
+Games are always replayed from the standard starting position.
+"""
+
+import argparse
+import base64
+import struct
+
+import chess
+
+PROMOTIONS = [None, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]
+
+MOVE_FORMATS = ('uci', 'san', 'packed')
+
+
+def encode_move(move):
+    return move.from_square | move.to_square << 6 | PROMOTIONS.index(move.promotion) << 12
+
+
+def decode_move(code):
+    return chess.Move(code & 63, code >> 6 & 63, PROMOTIONS[code >> 12 & 7])
+
+
+def pack_moves(moves):
+    return struct.pack(f'<{len(moves)}H', *(encode_move(move) for move in moves))
+
+
+def unpack_moves(data):
+    return [decode_move(code) for code in struct.unpack(f'<{len(data) // 2}H', data)]
+
+
+def _move_tokens(text):
+    # Skips move numbers
+    return [token for token in text.split() if not (token[0].isdigit() and token.rstrip('.').isdigit())]
+
+
+def parse_moves(text):
+    """Moves of a saved game (UCI or SAN, space separated) as chess.Move"""
+    board = chess.Board()
+    moves = []
+    for token in _move_tokens(text):
+        try:
+            move = chess.Move.from_uci(token)
+            if move not in board.legal_moves:
+                raise ValueError(token)
+        except ValueError:
+            move = board.parse_san(token)
+        board.push(move)
+        moves.append(move)
+    return moves
+
+
+def replay(data):
+    """Board after the packed moves; moves are trusted, not re-validated"""
+    board = chess.Board()
+    for move in unpack_moves(data):
+        board.push(move)
+    return board
+
+
+def format_moves(moves, move_format='uci'):
+    if move_format == 'packed':
+        return base64.b64encode(pack_moves(moves)).decode('ascii')
+    if move_format == 'san':
+        board = chess.Board()
+        sans = []
+        for move in moves:
+            sans.append(board.san(move))
+            board.push(move)
+        return ' '.join(sans)
+    return ' '.join(move.uci() for move in moves)
+
+
+def notation(text):
+    """'uci' when every move of a saved game's text is written in UCI, else 'san'"""
+    try:
+        for token in _move_tokens(text):
+            chess.Move.from_uci(token)
+    except ValueError:
+        return 'san'
+    return 'uci'
+
+
+def stored_moves(text, packed):
+    """Moves of a games row, from the packed column when it is filled"""
+    if packed is not None:
+        return unpack_moves(packed)
+    return parse_moves(text or '')
+
+
+def format_stored_moves(text, packed, moves_notation=None, move_format=None):
+    """A games row's moves for the API. Without a format, the text is
+    returned as stored, or for packed rows without text the moves in the
+    notation they were saved in (UCI for rows saved before it was
+    recorded); rows whose text cannot be parsed are always returned as
+    stored (or None for 'packed')."""
+    if move_format is None:
+        if packed is None or text:
+            return text
+        move_format = moves_notation or 'uci'
+    try:
+        moves = stored_moves(text, packed)
+    except ValueError:
+        return None if move_format == 'packed' else text
+    return format_moves(moves, move_format or 'uci')
+
+
+def encode_for_storage(text):
+    """(moves text, packed moves, notation) to store for a saved game's move text.
+
+    Parseable games are stored packed with empty text and the notation
+    they were written in; anything else is kept as text only.
+    """
+    try:
+        return '', pack_moves(parse_moves(text or '')), notation(text or '')
+    except ValueError:
+        return text, None, None
+
+
+def migrate(session_factory, model, batch_size=500, drop_text=False):
+    """Pack the moves of rows that only have text, recording their notation;
+    the text is kept unless drop_text. Returns (packed, skipped)."""
+    packed = skipped = 0
+    last_id = 0
+    while True:
+        session = session_factory()
+        try:
+            rows = (session.query(model)
+                    .filter(model.moves_packed.is_(None), model.id > last_id)
+                    .order_by(model.id).limit(batch_size).all())
+            if not rows:
+                return packed, skipped
+            for row in rows:
+                last_id = row.id
+                text, data, moves_notation = encode_for_storage(row.moves)
+                if data is None:
+                    skipped += 1
+                    continue
+                row.moves_packed = data
+                row.moves_notation = moves_notation
+                if drop_text:
+                    row.moves = text
+                packed += 1
+            session.commit()
+        finally:
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack the move lists of saved games')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--drop-text', action='store_true',
+                        help='empty the text column of packed games (they are then returned in their recorded notation)')
+    args = parser.parse_args()
+
+    from app import Session, GameRecord
+    packed, skipped = migrate(Session, GameRecord, args.batch_size, args.drop_text)
+    print(f'Packed {packed} games, left {skipped} unparseable games as text')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# move_ordering.py
+
+import chess
+
+from search_board import BASE_MOVE_MASK, CAPTURE as CAPTURE_FLAG, EN_PASSANT
+
+# Sort classes, highest searched first
+HASH_MOVE = 4
+CAPTURE = 3
+PROMOTION = 2
+KILLER = 1
+QUIET = 0
+
+KILLERS_PER_PLY = 2
+
+# order_codes packs (sort class, rank within class) into one int
+CLASS_SHIFT = 48
+
+
+class MoveOrderer:
+    """Orders moves for alpha-beta: hash move, MVV-LVA captures, promotions,
+    killer moves for the ply, then quiet moves by history score.
+
+    Killers and history are learned from beta cutoffs and kept for the
+    whole search, so later iterations of iterative deepening benefit too.
+    """
+
+    def __init__(self):
+        self.killers = {}
+        self.history = {}
+
+    def order(self, board, moves, hash_move=None):
+        """Sort moves in place, best candidates first, and return them"""
+        killers = self.killers.get(len(board.move_stack), ())
+        history = self.history
+        turn = board.turn
+
+        def sort_key(move):
+            if move == hash_move:
+                return (HASH_MOVE, 0)
+            if board.is_capture(move):
+                if board.is_en_passant(move):
+                    victim = chess.PAWN
+                else:
+                    victim = board.piece_type_at(move.to_square)
+                attacker = board.piece_type_at(move.from_square)
+                # Most valuable victim first, then least valuable attacker
+                return (CAPTURE, victim * 8 - attacker)
+            if move.promotion:
+                return (PROMOTION, move.promotion)
+            if move in killers:
+                return (KILLER, KILLERS_PER_PLY - killers.index(move))
+            return (QUIET, history.get((turn, move.from_square, move.to_square), 0))
+
+        moves.sort(key=sort_key, reverse=True)
+        return moves
+
+    def record_cutoff(self, board, move, depth):
+        """Learn from a quiet move that caused a beta cutoff"""
+        if move.promotion or board.is_capture(move):
+            return
+        ply = len(board.move_stack)
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS_PER_PLY:]
+        key = (board.turn, move.from_square, move.to_square)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def order_codes(self, board, moves, hash_move=None):
+        """order() for SearchBoard move codes; hash_move is a move_encoding code"""
+        killers = self.killers.get(board.ply, ())
+        history = self.history
+        turn = board.turn
+        mailbox = board.mailbox
+
+        def sort_key(move):
+            if move & BASE_MOVE_MASK == hash_move:
+                return HASH_MOVE << CLASS_SHIFT
+            if move & CAPTURE_FLAG:
+                victim = chess.PAWN if move & EN_PASSANT else mailbox[move >> 6 & 63] & 7
+                return CAPTURE << CLASS_SHIFT | victim * 8 - (mailbox[move & 63] & 7)
+            promotion = move >> 12 & 7
+            if promotion:
+                return PROMOTION << CLASS_SHIFT | promotion + 1
+            if move in killers:
+                return KILLER << CLASS_SHIFT | KILLERS_PER_PLY - killers.index(move)
+            return history.get((turn, move & 63, move >> 6 & 63), 0)
+
+        moves.sort(key=sort_key, reverse=True)
+        return moves
+
+    def record_code_cutoff(self, board, move, depth):
+        """record_cutoff for a SearchBoard move code"""
+        if move & CAPTURE_FLAG or move >> 12 & 7:
+            return
+        killers = self.killers.setdefault(board.ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLERS_PER_PLY:]
+        key = (board.turn, move & 63, move >> 6 & 63)
+        self.history[key] = self.history.get(key, 0) + depth * depth
@@ -0,0 +1,133 @@
+# opening_book.py
+
+import argparse
+import struct
+from collections import defaultdict
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+from move_encoding import stored_moves
+
+# Polyglot entry: key, move, weight, learn (big-endian, 16 bytes)
+ENTRY_STRUCT = struct.Struct('>QHHI')
+
+DEFAULT_MAX_PLY = 20
+
+PROMOTION_CODES = {None: 0, chess.KNIGHT: 1, chess.BISHOP: 2, chess.ROOK: 3, chess.QUEEN: 4}
+
+
+def encode_move(board, move):
+    """Polyglot move encoding; castling is written as king-takes-rook"""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rank = chess.square_rank(move.from_square)
+        file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(file, rank)
+    return to_square | move.from_square << 6 | PROMOTION_CODES[move.promotion] << 12
+
+
+def result_weight(result, color):
+    """Book weight for one game: 2 for a win by the side to move, 1 for a
+    draw or unknown result, 0 for a loss (polyglot readers skip those)"""
+    if result == '1/2-1/2':
+        return 1
+    if result in ('1-0', '0-1'):
+        return 2 if (result == '1-0') == (color == chess.WHITE) else 0
+    return 1
+
+
+class BookBuilder:
+    """Accumulates move statistics from games and writes a Polyglot book"""
+
+    def __init__(self, max_ply=DEFAULT_MAX_PLY):
+        self.max_ply = max_ply
+        self.weights = defaultdict(int)
+        self.games = 0
+
+    def add_game(self, moves, result='*'):
+        """Add one game given as a sequence of chess.Move from the start position"""
+        board = chess.Board()
+        for ply, move in enumerate(moves):
+            if ply >= self.max_ply:
+                break
+            key = chess.polyglot.zobrist_hash(board)
+            self.weights[(key, encode_move(board, move))] += result_weight(result, board.turn)
+            board.push(move)
+        self.games += 1
+
+    def add_pgn(self, handle):
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+            if game.headers.get('Variant', 'Standard') != 'Standard' or 'FEN' in game.headers:
+                continue
+            self.add_game(game.mainline_moves(), game.headers.get('Result', '*'))
+
+    def write(self, path):
+        """Write entries sorted by key, then weight (heaviest first)"""
+        largest = max(self.weights.values(), default=0)
+        scale = 0xFFFF / largest if largest > 0xFFFF else 1
+        entries = sorted(
+            ((key, move, max(1, int(weight * scale)) if weight else 0)
+             for (key, move), weight in self.weights.items()),
+            key=lambda entry: (entry[0], -entry[2]),
+        )
+        with open(path, 'wb') as handle:
+            for key, move, weight in entries:
+                handle.write(ENTRY_STRUCT.pack(key, move, weight, 0))
+        return len(entries)
+
+
+class OpeningBook:
+    """Read-only Polyglot book, memory-mapped and searched by binary search
+    on the Zobrist key (python-chess's polyglot reader)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.reader = chess.polyglot.open_reader(path)
+
+    def choose(self, board):
+        """Highest-weighted book move for the position, or None"""
+        entry = self.reader.get(board)
+        return entry.move if entry is not None else None
+
+    def moves(self, board):
+        return [(entry.move, entry.weight) for entry in self.reader.find_all(board)]
+
+    def close(self):
+        self.reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a Polyglot opening book')
+    parser.add_argument('output', help='book file to write')
+    parser.add_argument('--pgn', action='append', default=[], help='PGN file to read (repeatable)')
+    parser.add_argument('--from-db', action='store_true', help='also read the saved games table')
+    parser.add_argument('--max-ply', type=int, default=DEFAULT_MAX_PLY)
+    args = parser.parse_args()
+
+    builder = BookBuilder(max_ply=args.max_ply)
+    for path in args.pgn:
+        with open(path) as handle:
+            builder.add_pgn(handle)
+    if args.from_db:
+        from app import Session, GameRecord
+        session = Session()
+        try:
+            query = session.query(GameRecord.moves, GameRecord.moves_packed, GameRecord.result)
+            for moves, packed, result in query.yield_per(500):
+                try:
+                    builder.add_game(stored_moves(moves, packed), result)
+                except ValueError:
+                    continue
+        finally:
+            session.close()
+    count = builder.write(args.output)
+    print(f'Wrote {count} entries from {builder.games} games to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# ponder.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from search_context import SearchContext
+from search_jobs import JobManager, JobQueueFull
+
+
+class ActivityCounter:
+    """Number of operations in progress; use as a context manager around each"""
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.count += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.count -= 1
+
+    def active(self):
+        return self.count > 0
+
+
+class ThrottledContext(SearchContext):
+    """SearchContext that pauses between batches of nodes so the search
+    keeps at most duty_cycle of one CPU busy, and stops searching
+    altogether while yield_to() is true (e.g. foreground searches are
+    running), so it never competes with them for the GIL. Pauses end
+    early on cancel."""
+
+    CHECK_EVERY = 1024
+    # Nodes between yield_to checks, and seconds between them while yielding
+    YIELD_CHECK_EVERY = 64
+    YIELD_POLL_SECONDS = 0.01
+
+    def __init__(self, duty_cycle=1.0, yield_to=None, **kwargs):
+        super().__init__(**kwargs)
+        self.duty_cycle = duty_cycle
+        self.yield_to = yield_to
+        self.busy_since = time.monotonic()
+
+    def pause(self, seconds):
+        """Sleep; True if the search was cancelled meanwhile"""
+        if self.cancel_event is not None:
+            return self.cancel_event.wait(seconds)
+        time.sleep(seconds)
+        return False
+
+    def visit(self):
+        super().visit()
+        if self.yield_to is not None and self.nodes % self.YIELD_CHECK_EVERY == 0 and self.yield_to():
+            while self.yield_to() and not self.pause(self.YIELD_POLL_SECONDS):
+                pass
+            self.busy_since = time.monotonic()
+        if self.duty_cycle < 1.0 and self.nodes % self.CHECK_EVERY == 0:
+            busy = time.monotonic() - self.busy_since
+            self.pause(busy * (1.0 - self.duty_cycle) / self.duty_cycle)
+            self.busy_since = time.monotonic()
+
+
+class Ponderer:
+    """At most one background search per game, run on a small job pool.
+
+    start() replaces the game's previous ponder search; stop() cancels it
+    and hands back its job so the caller can use what it found.
+    """
+
+    def __init__(self, runner, max_workers=1, max_games=64):
+        self.jobs = JobManager(runner, max_workers=max_workers, max_jobs=max_games)
+        self.max_games = max_games
+        self.by_game = OrderedDict()
+        self.lock = threading.Lock()
+
+    def start(self, game_id, params):
+        self.stop(game_id)
+        try:
+            job = self.jobs.submit(params)
+        except JobQueueFull:
+            return None
+        with self.lock:
+            self.by_game[game_id] = job
+            while len(self.by_game) > self.max_games:
+                _, stale = self.by_game.popitem(last=False)
+                self.jobs.cancel(stale.id)
+        return job
+
+    def stop(self, game_id):
+        with self.lock:
+            job = self.by_game.pop(game_id, None)
+        if job is not None:
+            self.jobs.cancel(job.id)
+        return job
+
+    def get(self, game_id):
+        with self.lock:
+            return self.by_game.get(game_id)
@@ -0,0 +1,78 @@
+# position_index.py
+"""Index of the positions reached in saved games.
+
+Each row is (Zobrist key, game id, ply), with the key stored as a signed
+64-bit integer so it fits a BIGINT column.
+"""
+
+import argparse
+
+import chess
+import chess.polyglot
+
+from move_encoding import stored_moves
+
+
+def signed_key(board):
+    key = chess.polyglot.zobrist_hash(board)
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def position_rows(game_id, moves):
+    """Index rows for every position of a game, the start position included"""
+    board = chess.Board()
+    rows = [{'zobrist': signed_key(board), 'game_id': game_id, 'ply': 0}]
+    for ply, move in enumerate(moves, start=1):
+        board.push(move)
+        rows.append({'zobrist': signed_key(board), 'game_id': game_id, 'ply': ply})
+    return rows
+
+
+def game_position_rows(game_id, text, packed):
+    """Index rows for a games row, or [] if its moves cannot be read"""
+    try:
+        return position_rows(game_id, stored_moves(text, packed))
+    except ValueError:
+        return []
+
+
+def backfill(session_factory, game_model, position_model, batch_size=200):
+    """Index every game that has no positions yet. Returns (indexed, skipped)."""
+    indexed = skipped = 0
+    last_id = 0
+    while True:
+        session = session_factory()
+        try:
+            indexed_games = session.query(position_model.game_id).filter(position_model.game_id == game_model.id)
+            games = (session.query(game_model.id, game_model.moves, game_model.moves_packed)
+                     .filter(game_model.id > last_id, ~indexed_games.exists())
+                     .order_by(game_model.id).limit(batch_size).all())
+            if not games:
+                return indexed, skipped
+            rows = []
+            for game_id, text, packed in games:
+                last_id = game_id
+                game_rows = game_position_rows(game_id, text, packed)
+                if game_rows:
+                    rows.extend(game_rows)
+                    indexed += 1
+                else:
+                    skipped += 1
+            session.bulk_insert_mappings(position_model, rows)
+            session.commit()
+        finally:
+            session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index the positions of saved games')
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args()
+
+    from app import Session, GameRecord, GamePosition
+    indexed, skipped = backfill(Session, GameRecord, GamePosition, args.batch_size)
+    print(f'Indexed {indexed} games, skipped {skipped} unreadable games')
+
+
+if __name__ == '__main__':
+    main()
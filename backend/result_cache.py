@@ -0,0 +1,76 @@
+# result_cache.py
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """LRU cache of finished search results, keyed by (position, engine, depth).
+
+    With a sqlite_path, results are also written to a local SQLite file,
+    which survives restarts and is shared by every worker process using
+    the same path; misses in memory fall back to it.
+    """
+
+    def __init__(self, max_size=4096, sqlite_path=None):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if sqlite_path:
+            self.db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('CREATE TABLE IF NOT EXISTS search_results (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self.db.commit()
+
+    @staticmethod
+    def make_key(board, engine, depth):
+        """Position key without move counters, plus engine and depth"""
+        return f'{board.epd()}|{engine}|{depth}'
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if self.db is not None:
+                row = self.db.execute('SELECT value FROM search_results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self._remember(key, value)
+            if self.db is not None:
+                self.db.execute('INSERT OR REPLACE INTO search_results (key, value) VALUES (?, ?)',
+                                (key, json.dumps(value)))
+                self.db.commit()
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self.db is not None:
+                self.db.execute('DELETE FROM search_results')
+                self.db.commit()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'max_size': self.max_size}
@@ -0,0 +1,390 @@
+# search.py
+"""Game-tree search: minimax, alpha-beta, principal variation search and
+iterative deepening, plus search_request, which answers a move request.
+
+Nothing here touches the database or Flask, so pool workers (see
+search_worker.py) can import it in a fresh interpreter.
+"""
+
+import math
+import os
+
+import chess
+import chess.polyglot
+
+from move_encoding import decode_move
+from search_board import BASE_MOVE_MASK, SearchBoard, to_move
+from search_context import SearchContext, SearchAborted
+from tablebase import MAX_PIECES, Tablebases
+from transposition import EXACT, LOWER, UPPER
+
+# Transposition table size for searches that do not bring their own
+TT_SIZE_MB = int(os.getenv('TT_SIZE_MB', 16))
+
+# Upper bound on iterative deepening when only a time/node budget is given
+MAX_SEARCH_DEPTH = 32
+
+# Principal variation search: null window narrower than one centipawn, and
+# the aspiration window (in pawns) around the previous iteration's score
+PVS_NULL_WINDOW = 0.001
+ASPIRATION_WINDOW = 0.5
+_FLIPPED_BOUND = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}
+
+# Endgame distance-to-mate tables (generate with tablebase.py), probed in search
+TABLEBASE_DIR = os.getenv('TABLEBASE_DIR', os.path.join(os.path.dirname(__file__), 'tablebases'))
+tablebases = Tablebases(TABLEBASE_DIR) if os.path.isdir(TABLEBASE_DIR) else None
+if tablebases is not None and not len(tablebases):
+    tablebases = None
+
+def minimax(board, depth, maximizing_player, engine_color=chess.WHITE, ctx=None):
+    """Minimax algorithm.
+
+    Like alpha_beta it runs on a SearchBoard built from board, which is left
+    untouched even if ctx aborts the search; the move returned is a chess.Move.
+    """
+    if ctx is None:
+        ctx = SearchContext()
+    move, score = _minimax(SearchBoard.from_board(board), depth, maximizing_player, ctx)
+    return (to_move(move) if move is not None else None), score
+
+def _minimax(board, depth, maximizing_player, ctx):
+    """minimax on a SearchBoard; moves are SearchBoard move codes"""
+    ctx.visit()
+    if not board.has_legal_move():
+        return None, board.terminal_score()
+    if board.is_draw():
+        return None, 0.0
+    if depth == 0:
+        return None, ctx.evaluate(board, SearchBoard.evaluate)
+    if depth == 1:
+        return _minimax_frontier(board, maximizing_player, ctx)
+    
+    best_move, best_eval = None, None
+    for move in board.legal_moves():
+        board.make(move)
+        _, eval_score = _minimax(board, depth - 1, not maximizing_player, ctx)
+        board.unmake()
+        if best_move is None or (eval_score > best_eval if maximizing_player else eval_score < best_eval):
+            best_move, best_eval = move, eval_score
+    return best_move, best_eval
+
+def _minimax_frontier(board, maximizing_player, ctx):
+    """Depth-1 minimax node: its children are leaves, and the ones that are
+    not game over are scored as a batch by SearchBoard.evaluate_child, which
+    reuses the mobility of this position for every piece a move leaves alone"""
+    total, terms = board.mobility_terms()
+    occ = list(board.occ)
+    best_move, best_eval = None, None
+    for move in board.legal_moves():
+        board.make(move)
+        ctx.visit()
+        if not board.has_legal_move():
+            eval_score = board.terminal_score()
+        elif board.is_draw():
+            eval_score = 0.0
+        else:
+            eval_score = ctx.evaluate(board, SearchBoard.evaluate_child, total, terms, occ)
+        board.unmake()
+        if best_move is None or (eval_score > best_eval if maximizing_player else eval_score < best_eval):
+            best_move, best_eval = move, eval_score
+    return best_move, best_eval
+
+def _usable_hash_move(board, hash_move, ctx):
+    """Whether a table cutoff may return hash_move. Below the root the move
+    is discarded, but at the root it is played, and the table can hold a
+    move for another position: ponder and foreground searches write to it
+    concurrently, and the packed move is only checked by key."""
+    if board.ply != ctx.root_ply:
+        return True
+    return any(move & BASE_MOVE_MASK == hash_move for move in board.legal_moves())
+
+def alpha_beta(board, depth, alpha, beta, maximizing_player, engine_color=chess.WHITE, tt=None, ctx=None):
+    """Alpha-Beta Pruning algorithm, optionally backed by a transposition table.
+
+    The search runs on a SearchBoard built from board, which is left
+    untouched; the move returned is a chess.Move.
+    """
+    if ctx is None:
+        ctx = SearchContext()
+    search_board = SearchBoard.from_board(board)
+    if ctx.root_ply is None:
+        ctx.root_ply = search_board.ply
+    move, score = _alpha_beta(search_board, depth, alpha, beta, maximizing_player, tt, ctx)
+    return (to_move(move) if move is not None else None), score
+
+def _alpha_beta(board, depth, alpha, beta, maximizing_player, tt, ctx):
+    """alpha_beta on a SearchBoard; moves are SearchBoard move codes"""
+    ctx.visit()
+    if not board.has_legal_move():
+        return None, board.terminal_score()
+    if board.is_draw():
+        return None, 0.0
+    if (tablebases is not None and board.ply > ctx.root_ply
+            and board.occupied.bit_count() <= MAX_PIECES and not board.castling):
+        tb_score = tablebases.probe_score(board.to_board())
+        if tb_score is not None:
+            return None, tb_score
+    if depth == 0:
+        return None, ctx.evaluate(board, SearchBoard.evaluate)
+    
+    key = None
+    hash_move = None
+    if tt is not None:
+        key = board.zobrist()
+        entry = tt.probe(key)
+        if entry is not None and entry.move is not None:
+            hash_move = entry.move
+            if entry.depth >= depth and _usable_hash_move(board, hash_move, ctx):
+                if entry.flag == EXACT:
+                    return hash_move, entry.score
+                if entry.flag == LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if beta <= alpha:
+                    return hash_move, entry.score
+    alpha_orig, beta_orig = alpha, beta
+    
+    legal_moves = ctx.ordering.order_codes(board, board.legal_moves(), hash_move)
+    
+    if maximizing_player:
+        best_eval = -math.inf
+        best_move = legal_moves[0]
+        for index, move in enumerate(legal_moves):
+            board.make(move)
+            _, eval_score = _alpha_beta(board, depth - 1, alpha, beta, False, tt, ctx)
+            board.unmake()
+            if eval_score > best_eval:
+                best_eval = eval_score
+                best_move = move
+            alpha = max(alpha, eval_score)
+            if beta <= alpha:
+                ctx.record_cutoff(board, move, depth, index)
+                break
+    else:
+        best_eval = math.inf
+        best_move = legal_moves[0]
+        for index, move in enumerate(legal_moves):
+            board.make(move)
+            _, eval_score = _alpha_beta(board, depth - 1, alpha, beta, True, tt, ctx)
+            board.unmake()
+            if eval_score < best_eval:
+                best_eval = eval_score
+                best_move = move
+            beta = min(beta, eval_score)
+            if beta <= alpha:
+                ctx.record_cutoff(board, move, depth, index)
+                break
+    
+    if tt is not None:
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        tt.store(key, depth, best_eval, flag, best_move)
+    return best_move, best_eval
+
+def pvs(board, depth, alpha, beta, tt=None, ctx=None):
+    """Principal variation search (negamax form).
+
+    Scores are from the side to move's point of view. Moves after the first
+    are searched with a null window and re-searched only if they beat alpha.
+    Table entries are stored from White's point of view, as in alpha_beta.
+    Like alpha_beta it runs on a SearchBoard and returns a chess.Move.
+    """
+    if ctx is None:
+        ctx = SearchContext()
+    search_board = SearchBoard.from_board(board)
+    if ctx.root_ply is None:
+        ctx.root_ply = search_board.ply
+    move, score = _pvs(search_board, depth, alpha, beta, tt, ctx)
+    return (to_move(move) if move is not None else None), score
+
+def _pvs(board, depth, alpha, beta, tt, ctx):
+    """pvs on a SearchBoard; moves are SearchBoard move codes"""
+    ctx.visit()
+    sign = 1 if board.turn else -1
+    if not board.has_legal_move():
+        return None, sign * board.terminal_score()
+    if board.is_draw():
+        return None, 0.0
+    if (tablebases is not None and board.ply > ctx.root_ply
+            and board.occupied.bit_count() <= MAX_PIECES and not board.castling):
+        tb_score = tablebases.probe_score(board.to_board())
+        if tb_score is not None:
+            return None, sign * tb_score
+    if depth == 0:
+        return None, sign * ctx.evaluate(board, SearchBoard.evaluate)
+    
+    key = None
+    hash_move = None
+    if tt is not None:
+        key = board.zobrist()
+        entry = tt.probe(key)
+        if entry is not None and entry.move is not None:
+            hash_move = entry.move
+            if entry.depth >= depth and _usable_hash_move(board, hash_move, ctx):
+                score = sign * entry.score
+                flag = entry.flag if sign == 1 else _FLIPPED_BOUND[entry.flag]
+                if flag == EXACT:
+                    return hash_move, score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return hash_move, score
+    alpha_orig = alpha
+    
+    legal_moves = ctx.ordering.order_codes(board, board.legal_moves(), hash_move)
+    best_score = -math.inf
+    best_move = legal_moves[0]
+    for index, move in enumerate(legal_moves):
+        board.make(move)
+        if index == 0:
+            score = -_pvs(board, depth - 1, -beta, -alpha, tt, ctx)[1]
+        else:
+            score = -_pvs(board, depth - 1, -alpha - PVS_NULL_WINDOW, -alpha, tt, ctx)[1]
+            if alpha < score < beta:
+                score = -_pvs(board, depth - 1, -beta, -score, tt, ctx)[1]
+        board.unmake()
+        if score > best_score:
+            best_score = score
+            best_move = move
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            ctx.record_cutoff(board, move, depth, index)
+            break
+    
+    if tt is not None:
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if sign == -1:
+            flag = _FLIPPED_BOUND[flag]
+        tt.store(key, depth, sign * best_score, flag, best_move)
+    return best_move, best_score
+
+def _search_root(board, depth, tt, ctx, use_pvs, centre):
+    """One iteration of iterative deepening; returns (move, White-relative score)"""
+    if not use_pvs:
+        return alpha_beta(board, depth, -math.inf, math.inf, board.turn == chess.WHITE, tt=tt, ctx=ctx)
+    
+    sign = 1 if board.turn == chess.WHITE else -1
+    delta = ASPIRATION_WINDOW
+    if centre is None:
+        alpha, beta = -math.inf, math.inf
+    else:
+        # Aspiration window around the score of the last iteration with the
+        # same parity (odd and even depths disagree by more than the window);
+        # on a fail low/high the failing side is widened and the depth re-searched
+        alpha = sign * centre - delta
+        beta = sign * centre + delta
+    while True:
+        move, score = pvs(board, depth, alpha, beta, tt=tt, ctx=ctx)
+        if score <= alpha:
+            delta *= 4
+            alpha = score - delta
+        elif score >= beta:
+            delta *= 4
+            beta = score + delta
+        else:
+            return move, sign * score
+
+def iterative_deepening(board, max_depth, tt=None, ctx=None, engine='alphabeta', on_iteration=None):
+    """Search depth 1, 2, ... max_depth until the context's budget runs out.
+
+    Returns (move, score, depth) from the deepest fully completed iteration,
+    with the score from White's point of view. Depth 1 always runs to
+    completion so there is a move to play. engine='pvs' searches with pvs
+    and aspiration windows instead of alpha_beta. on_iteration, if given,
+    is called as on_iteration(depth, move, score, ctx) after each iteration.
+    """
+    if ctx is None:
+        ctx = SearchContext()
+    use_pvs = engine == 'pvs'
+    best_move, best_score, completed = None, None, 0
+    scores = {}
+    root_ply = len(board.move_stack)
+    for depth in range(1, max_depth + 1):
+        ctx.enforce_limits = completed > 0
+        try:
+            move, score = _search_root(board, depth, tt, ctx, use_pvs, scores.get(depth - 2))
+        except SearchAborted:
+            # The abort unwinds without popping; put the board back at the root
+            while len(board.move_stack) > root_ply:
+                board.pop()
+            break
+        best_move, best_score, completed = move, score, depth
+        scores[depth] = score
+        if on_iteration is not None:
+            on_iteration(depth, move, score, ctx)
+        if move is None:
+            break
+    return best_move, best_score, completed
+
+def principal_variation(board, tt, max_length=MAX_SEARCH_DEPTH):
+    """Follow best moves stored in the transposition table from the position"""
+    board = board.copy(stack=False)
+    pv, seen = [], set()
+    while len(pv) < max_length:
+        key = chess.polyglot.zobrist_hash(board)
+        entry = tt.probe(key) if tt is not None else None
+        if entry is None or entry.move is None or key in seen:
+            break
+        move = decode_move(entry.move)
+        if not board.is_legal(move):
+            break
+        seen.add(key)
+        pv.append(move)
+        board.push(move)
+    return pv
+
+def search_request(data, board, tt, parallel=None):
+    """Search for a move as described by a move request; returns (result, ctx).
+
+    tt is the table to search with (minimax ignores it). Requests for more
+    than one worker go to parallel(board, depth, workers, engine) if given.
+    """
+    engine = data.get('engine')
+    depth = data.get('depth', 4)
+    movetime_ms = data.get('movetime_ms')
+    max_nodes = data.get('max_nodes')
+    workers = int(data.get('workers', 1))
+    
+    if engine == 'minimax':
+        ctx = SearchContext()
+        move, _ = minimax(board, depth, board.turn == chess.WHITE, ctx=ctx)
+        result = {'move': move.uci() if move else None}
+        if data.get('stats'):
+            result['stats'] = dict(ctx.stats(), depth=depth)
+        return result, ctx
+    
+    tt.new_search()
+    ctx = SearchContext(movetime_ms=movetime_ms, max_nodes=max_nodes)
+    depth_reached = depth
+    if movetime_ms is None and max_nodes is None:
+        if parallel is not None and workers > 1 and depth > 1:
+            move, _, nodes = parallel(board, depth, workers, engine)
+            ctx.nodes = nodes
+        elif engine == 'pvs':
+            move, _, _ = iterative_deepening(board, depth, tt=tt, ctx=ctx, engine=engine)
+        else:
+            move, _ = alpha_beta(board, depth, -math.inf, math.inf, board.turn == chess.WHITE, tt=tt, ctx=ctx)
+        result = {'move': move.uci() if move else None}
+    else:
+        move, _, depth_reached = iterative_deepening(board, data.get('depth', MAX_SEARCH_DEPTH), tt=tt, ctx=ctx, engine=engine)
+        result = {
+            'move': move.uci() if move else None,
+            'depth': depth_reached,
+            'nodes': ctx.nodes,
+            'time_ms': round(ctx.elapsed_ms()),
+        }
+    if data.get('stats'):
+        result['stats'] = dict(ctx.stats(), depth=depth_reached)
+    return result, ctx
@@ -0,0 +1,642 @@
+# search_board.py
+"""Compact board for the search hot loop.
+
+SearchBoard keeps one integer bitboard per piece plus a square -> piece
+list, and encodes moves as ints: from square (bits 0-5), to square (bits
+6-11) and promotion (bits 12-14) exactly as move_encoding does, plus flag
+bits for captures, en passant, castling and double pawn pushes. make() and
+unmake() change the board in place, keeping its polyglot Zobrist key and
+its material + piece-square score up to date.
+
+Only standard chess is supported. Legal moves come out in the same order as
+python-chess generates them, so a search visits the same tree either way.
+"""
+
+import chess
+import chess.polyglot
+
+from evaluation import MATE_SCORE, MOBILITY_WEIGHT, SQUARE_SCORES
+from move_encoding import decode_move
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(1, 7)
+BLACK, WHITE = 0, 1
+
+# Move flags above the 15 bits shared with move_encoding
+BASE_MOVE_MASK = 0x7FFF
+CAPTURE = 1 << 15
+EN_PASSANT = 1 << 16
+CASTLING = 1 << 17
+DOUBLE_PUSH = 1 << 18
+
+# Deepest line make can play from one SearchBoard
+MAX_PLY = 256
+
+# Promotion pieces in python-chess generation order, as move_encoding indexes
+PROMOTION_CODES = [4 << 12, 3 << 12, 2 << 12, 1 << 12]
+BACK_RANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+# Precomputed attack tables (python-chess builds the slider ones at import)
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+PAWN_ATTACKS = chess.BB_PAWN_ATTACKS
+DIAG_MASKS, DIAG_ATTACKS = chess.BB_DIAG_MASKS, chess.BB_DIAG_ATTACKS
+FILE_MASKS, FILE_ATTACKS = chess.BB_FILE_MASKS, chess.BB_FILE_ATTACKS
+RANK_MASKS, RANK_ATTACKS = chess.BB_RANK_MASKS, chess.BB_RANK_ATTACKS
+RAYS = chess.BB_RAYS
+BETWEEN = [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+
+# Pieces are coded piece_type | color << 3, so tables have 16 rows
+_POLYGLOT = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+ZOBRIST = [[0] * 64 for _ in range(16)]
+SCORES = [[0] * 64 for _ in range(16)]
+for _color in (BLACK, WHITE):
+    for _piece_type in chess.PIECE_TYPES:
+        _piece = _piece_type | _color << 3
+        ZOBRIST[_piece] = [_POLYGLOT[64 * ((_piece_type - 1) * 2 + _color) + square] for square in chess.SQUARES]
+        SCORES[_piece] = list(SQUARE_SCORES[bool(_color)][_piece_type])
+
+# Castling rights as bits: 1 White short, 2 White long, 4 Black short, 8 Black long
+CASTLING_KEYS = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & 1 << _bit:
+            CASTLING_KEYS[_rights] ^= _POLYGLOT[768 + _bit]
+EP_KEYS = [_POLYGLOT[772 + file] for file in range(8)]
+TURN_KEY = _POLYGLOT[780]
+
+# Rights kept when a move starts or ends on a square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[chess.A1], CASTLING_MASK[chess.E1], CASTLING_MASK[chess.H1] = 13, 12, 14
+CASTLING_MASK[chess.A8], CASTLING_MASK[chess.E8], CASTLING_MASK[chess.H8] = 7, 3, 11
+
+# Per side, short castling first: (right, king from, king to, rook from,
+# rook to, squares that must be empty, squares the king crosses)
+CASTLES = {
+    WHITE: [(1, chess.E1, chess.G1, chess.H1, chess.F1, chess.BB_F1 | chess.BB_G1, (chess.F1, chess.G1)),
+            (2, chess.E1, chess.C1, chess.A1, chess.D1, chess.BB_B1 | chess.BB_C1 | chess.BB_D1, (chess.D1, chess.C1))],
+    BLACK: [(4, chess.E8, chess.G8, chess.H8, chess.F8, chess.BB_F8 | chess.BB_G8, (chess.F8, chess.G8)),
+            (8, chess.E8, chess.C8, chess.A8, chess.D8, chess.BB_B8 | chess.BB_C8 | chess.BB_D8, (chess.D8, chess.C8))],
+}
+ROOK_CASTLING_SQUARES = {chess.G1: (chess.H1, chess.F1), chess.C1: (chess.A1, chess.D1),
+                         chess.G8: (chess.H8, chess.F8), chess.C8: (chess.A8, chess.D8)}
+
+
+def slider_attacks(piece_type, square, occupied):
+    attacks = 0
+    if piece_type != ROOK:
+        attacks = DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied]
+    if piece_type != BISHOP:
+        attacks |= (RANK_ATTACKS[square][RANK_MASKS[square] & occupied]
+                    | FILE_ATTACKS[square][FILE_MASKS[square] & occupied])
+    return attacks
+
+
+def to_move(code):
+    """chess.Move for a move code"""
+    return decode_move(code & BASE_MOVE_MASK)
+
+
+class SearchBoard:
+    """Position for the search: bitboards, piece list, and undo arrays
+    preallocated for MAX_PLY moves, so make/unmake build no Move, board or
+    tuple objects. keys holds the Zobrist key of every earlier position
+    (for repetitions); keys[:nkeys] are the ones before the search started
+    or made so far."""
+
+    __slots__ = ('bb', 'occ', 'occupied', 'mailbox', 'turn', 'castling', 'ep', 'halfmove', 'ply',
+                 'key', 'score', 'sp', 'undo_move', 'undo_state', 'undo_key', 'undo_score', 'keys', 'nkeys')
+
+    @classmethod
+    def from_board(cls, board):
+        """SearchBoard for a chess.Board. ply is board.ply(), so mate scores
+        match evaluate_terminal; positions since the last capture or pawn
+        move are kept for the fivefold repetition rule."""
+        self = cls.__new__(cls)
+        self.bb = [0] * 16
+        self.mailbox = [0] * 64
+        for color in (BLACK, WHITE):
+            for piece_type in chess.PIECE_TYPES:
+                piece = piece_type | color << 3
+                mask = board.pieces_mask(piece_type, bool(color))
+                self.bb[piece] = mask
+                for square in chess.scan_forward(mask):
+                    self.mailbox[square] = piece
+        self.occ = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.occupied = board.occupied
+        self.turn = WHITE if board.turn == chess.WHITE else BLACK
+        rights = board.clean_castling_rights()
+        self.castling = ((1 if rights & chess.BB_H1 else 0) | (2 if rights & chess.BB_A1 else 0)
+                         | (4 if rights & chess.BB_H8 else 0) | (8 if rights & chess.BB_A8 else 0))
+        self.ep = board.ep_square if board.ep_square is not None else -1
+        self.halfmove = board.halfmove_clock
+        self.ply = board.ply()
+        key = CASTLING_KEYS[self.castling] ^ (TURN_KEY if self.turn else 0)
+        score = 0
+        for square, piece in enumerate(self.mailbox):
+            if piece:
+                key ^= ZOBRIST[piece][square]
+                score += SCORES[piece][square]
+        self.key = key
+        self.score = score
+        self.sp = 0
+        self.undo_move = [0] * MAX_PLY
+        self.undo_state = [0] * MAX_PLY
+        self.undo_key = [0] * MAX_PLY
+        self.undo_score = [0] * MAX_PLY
+        keys = []
+        history = min(board.halfmove_clock, len(board.move_stack))
+        if history:
+            previous = board.copy()
+            for _ in range(history):
+                previous.pop()
+                keys.append(chess.polyglot.zobrist_hash(previous))
+            keys.reverse()
+        self.nkeys = len(keys)
+        self.keys = keys + [0] * MAX_PLY
+        return self
+
+    def to_board(self):
+        """Equivalent chess.Board, without move history"""
+        board = chess.Board.empty()
+        for square, piece in enumerate(self.mailbox):
+            if piece:
+                board.set_piece_at(square, chess.Piece(piece & 7, bool(piece >> 3)))
+        board.turn = bool(self.turn)
+        rights = self.castling
+        board.castling_rights = ((chess.BB_H1 if rights & 1 else 0) | (chess.BB_A1 if rights & 2 else 0)
+                                 | (chess.BB_H8 if rights & 4 else 0) | (chess.BB_A8 if rights & 8 else 0))
+        board.ep_square = self.ep if self.ep >= 0 else None
+        board.halfmove_clock = self.halfmove
+        board.fullmove_number = self.ply // 2 + 1
+        return board
+
+    def zobrist(self):
+        """Polyglot key, equal to chess.polyglot.zobrist_hash of the position"""
+        ep = self.ep
+        if ep < 0:
+            return self.key
+        us = self.turn
+        capturers = PAWN_ATTACKS[us ^ 1][ep] & self.bb[PAWN | us << 3]
+        return self.key ^ EP_KEYS[ep & 7] if capturers else self.key
+
+    def attackers(self, color, square, occupied):
+        """Bitboard of color's pieces attacking square"""
+        bb = self.bb
+        c = color << 3
+        queens = bb[QUEEN | c]
+        return ((KNIGHT_ATTACKS[square] & bb[KNIGHT | c])
+                | (KING_ATTACKS[square] & bb[KING | c])
+                | (PAWN_ATTACKS[color ^ 1][square] & bb[PAWN | c])
+                | ((RANK_ATTACKS[square][RANK_MASKS[square] & occupied]
+                    | FILE_ATTACKS[square][FILE_MASKS[square] & occupied]) & (bb[ROOK | c] | queens))
+                | (DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied] & (bb[BISHOP | c] | queens)))
+
+    def king_square(self, color):
+        return self.bb[KING | color << 3].bit_length() - 1
+
+    def in_check(self):
+        return bool(self.attackers(self.turn ^ 1, self.king_square(self.turn), self.occupied))
+
+    def pinned(self, king):
+        """Pieces of the side to move pinned to its king"""
+        bb = self.bb
+        c = (self.turn ^ 1) << 3
+        queens = bb[QUEEN | c]
+        snipers = (((RANK_ATTACKS[king][0] | FILE_ATTACKS[king][0]) & (bb[ROOK | c] | queens))
+                   | (DIAG_ATTACKS[king][0] & (bb[BISHOP | c] | queens)))
+        occupied = self.occupied
+        pinned = 0
+        while snipers:
+            sniper = snipers.bit_length() - 1
+            snipers ^= 1 << sniper
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers
+        return pinned & self.occ[self.turn]
+
+    def legal_moves(self):
+        """Legal move codes, in python-chess order"""
+        us = self.turn
+        them = us ^ 1
+        c = us << 3
+        bb, mailbox, occupied = self.bb, self.mailbox, self.occupied
+        own = self.occ[us]
+        king = bb[KING | c].bit_length() - 1
+        checkers = self.attackers(them, king, occupied)
+        pinned = self.pinned(king)
+        moves = []
+        if checkers:
+            # King moves first, off the checking sliders' lines
+            away = 0
+            sliders = checkers & ~(bb[KNIGHT | them << 3] | bb[PAWN | them << 3])
+            while sliders:
+                slider = sliders.bit_length() - 1
+                sliders ^= 1 << slider
+                away |= RAYS[king][slider] & ~(1 << slider)
+            targets = KING_ATTACKS[king] & ~own & ~away
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= 1 << to
+                if not self.attackers(them, to, occupied):
+                    moves.append(king | to << 6 | (CAPTURE if mailbox[to] else 0))
+            if checkers & (checkers - 1):
+                return moves
+            checker = checkers.bit_length() - 1
+            self._generate(moves, BETWEEN[king][checker] | checkers, king, pinned, checker)
+        else:
+            self._generate(moves, -1, king, pinned, None)
+        return moves
+
+    def _generate(self, moves, to_mask, king, pinned, checker):
+        """Append the non-evasion king moves (when not in check), castling,
+        piece and pawn moves that land on to_mask"""
+        us = self.turn
+        them = us ^ 1
+        c = us << 3
+        bb, mailbox, occupied = self.bb, self.mailbox, self.occupied
+        own = self.occ[us]
+        enemy = self.occ[them]
+        pawns = bb[PAWN | c]
+
+        pieces = own & ~pawns
+        if checker is not None:
+            pieces &= ~(1 << king)
+        while pieces:
+            frm = pieces.bit_length() - 1
+            pieces ^= 1 << frm
+            piece_type = mailbox[frm] & 7
+            if piece_type == KNIGHT:
+                targets = KNIGHT_ATTACKS[frm]
+            elif piece_type == KING:
+                targets = KING_ATTACKS[frm] & ~own
+                while targets:
+                    to = targets.bit_length() - 1
+                    targets ^= 1 << to
+                    if not self.attackers(them, to, occupied):
+                        moves.append(frm | to << 6 | (CAPTURE if mailbox[to] else 0))
+                continue
+            else:
+                targets = slider_attacks(piece_type, frm, occupied)
+            targets &= ~own & to_mask
+            if pinned >> frm & 1:
+                targets &= RAYS[king][frm]
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= 1 << to
+                moves.append(frm | to << 6 | (CAPTURE if mailbox[to] else 0))
+
+        if checker is None and self.castling:
+            for right, king_from, king_to, _, _, empty, path in CASTLES[us]:
+                if (self.castling & right and not occupied & empty
+                        and not self.attackers(them, path[0], occupied)
+                        and not self.attackers(them, path[1], occupied)):
+                    moves.append(king_from | king_to << 6 | CASTLING)
+
+        if not pawns:
+            return
+
+        # Captures
+        capturers = pawns
+        while capturers:
+            frm = capturers.bit_length() - 1
+            capturers ^= 1 << frm
+            targets = PAWN_ATTACKS[us][frm] & enemy & to_mask
+            if pinned >> frm & 1:
+                targets &= RAYS[king][frm]
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= 1 << to
+                code = frm | to << 6 | CAPTURE
+                if 1 << to & BACK_RANKS:
+                    moves.extend(code | promotion for promotion in PROMOTION_CODES)
+                else:
+                    moves.append(code)
+
+        # Pushes
+        empty = ~occupied
+        if us == WHITE:
+            singles = pawns << 8 & empty
+            doubles = singles << 8 & empty & chess.BB_RANK_4
+            step = 8
+        else:
+            singles = pawns >> 8 & empty
+            doubles = singles >> 8 & empty & chess.BB_RANK_5
+            step = -8
+        singles &= to_mask
+        doubles &= to_mask
+        while singles:
+            to = singles.bit_length() - 1
+            singles ^= 1 << to
+            frm = to - step
+            if pinned >> frm & 1 and not RAYS[king][frm] >> to & 1:
+                continue
+            code = frm | to << 6
+            if 1 << to & BACK_RANKS:
+                moves.extend(code | promotion for promotion in PROMOTION_CODES)
+            else:
+                moves.append(code)
+        while doubles:
+            to = doubles.bit_length() - 1
+            doubles ^= 1 << to
+            frm = to - 2 * step
+            if pinned >> frm & 1 and not RAYS[king][frm] >> to & 1:
+                continue
+            moves.append(frm | to << 6 | DOUBLE_PUSH)
+
+        # En passant, only when it lands on to_mask or takes the checking pawn
+        ep = self.ep
+        if ep >= 0 and not occupied >> ep & 1 and (to_mask >> ep & 1 or ep - step == checker):
+            capturers = pawns & PAWN_ATTACKS[them][ep]
+            while capturers:
+                frm = capturers.bit_length() - 1
+                capturers ^= 1 << frm
+                code = frm | ep << 6 | CAPTURE | EN_PASSANT
+                # Rare enough to check by playing it
+                self.make(code)
+                legal = not self.attackers(them, self.king_square(us), self.occupied)
+                self.unmake()
+                if legal:
+                    moves.append(code)
+
+    def has_legal_move(self):
+        """Whether the side to move has any legal move; usually answered
+        from a single unpinned piece without generating moves"""
+        us = self.turn
+        c = us << 3
+        bb, occupied = self.bb, self.occupied
+        own = self.occ[us]
+        king = bb[KING | c].bit_length() - 1
+        if not self.attackers(us ^ 1, king, occupied):
+            free = ~self.pinned(king)
+            knights = bb[KNIGHT | c] & free
+            while knights:
+                square = knights.bit_length() - 1
+                knights ^= 1 << square
+                if KNIGHT_ATTACKS[square] & ~own:
+                    return True
+            for piece_type in (QUEEN, ROOK, BISHOP):
+                sliders = bb[piece_type | c] & free
+                while sliders:
+                    square = sliders.bit_length() - 1
+                    sliders ^= 1 << square
+                    if slider_attacks(piece_type, square, occupied) & ~own:
+                        return True
+        return bool(self.legal_moves())
+
+    def make(self, move):
+        """Play a legal move code in place"""
+        frm = move & 63
+        to = move >> 6 & 63
+        us = self.turn
+        them = us ^ 1
+        bb, occ, mailbox = self.bb, self.occ, self.mailbox
+        piece = mailbox[frm]
+        captured = mailbox[to]
+        sp = self.sp
+        self.undo_move[sp] = move
+        self.undo_state[sp] = captured | self.castling << 4 | (self.ep + 1) << 8 | self.halfmove << 15
+        self.undo_key[sp] = self.key
+        self.undo_score[sp] = self.score
+        self.sp = sp + 1
+        self.keys[self.nkeys] = self.zobrist()
+        self.nkeys += 1
+
+        key = self.key ^ CASTLING_KEYS[self.castling] ^ TURN_KEY
+        score = self.score
+        from_bit, to_bit = 1 << frm, 1 << to
+        if captured:
+            bb[captured] ^= to_bit
+            occ[them] ^= to_bit
+            key ^= ZOBRIST[captured][to]
+            score -= SCORES[captured][to]
+        bb[piece] ^= from_bit | to_bit
+        occ[us] ^= from_bit | to_bit
+        mailbox[frm] = 0
+        mailbox[to] = piece
+        key ^= ZOBRIST[piece][frm] ^ ZOBRIST[piece][to]
+        score += SCORES[piece][to] - SCORES[piece][frm]
+        self.ep = -1
+        if move >> 12:
+            promotion = move >> 12 & 7
+            if promotion:
+                promoted = (promotion + 1) | us << 3
+                bb[piece] ^= to_bit
+                bb[promoted] ^= to_bit
+                mailbox[to] = promoted
+                key ^= ZOBRIST[piece][to] ^ ZOBRIST[promoted][to]
+                score += SCORES[promoted][to] - SCORES[piece][to]
+            if move & EN_PASSANT:
+                square = to - 8 if us == WHITE else to + 8
+                pawn = PAWN | them << 3
+                bb[pawn] ^= 1 << square
+                occ[them] ^= 1 << square
+                mailbox[square] = 0
+                key ^= ZOBRIST[pawn][square]
+                score -= SCORES[pawn][square]
+            elif move & CASTLING:
+                rook_from, rook_to = ROOK_CASTLING_SQUARES[to]
+                rook = mailbox[rook_from]
+                bb[rook] ^= 1 << rook_from | 1 << rook_to
+                occ[us] ^= 1 << rook_from | 1 << rook_to
+                mailbox[rook_from] = 0
+                mailbox[rook_to] = rook
+                key ^= ZOBRIST[rook][rook_from] ^ ZOBRIST[rook][rook_to]
+                score += SCORES[rook][rook_to] - SCORES[rook][rook_from]
+            elif move & DOUBLE_PUSH:
+                self.ep = (frm + to) >> 1
+        self.castling &= CASTLING_MASK[frm] & CASTLING_MASK[to]
+        self.key = key ^ CASTLING_KEYS[self.castling]
+        self.score = score
+        self.halfmove = 0 if captured or piece & 7 == PAWN else self.halfmove + 1
+        self.occupied = occ[0] | occ[1]
+        self.turn = them
+        self.ply += 1
+
+    def unmake(self):
+        """Take back the last move"""
+        sp = self.sp = self.sp - 1
+        self.nkeys -= 1
+        move = self.undo_move[sp]
+        state = self.undo_state[sp]
+        self.key = self.undo_key[sp]
+        self.score = self.undo_score[sp]
+        captured = state & 15
+        self.castling = state >> 4 & 15
+        self.ep = (state >> 8 & 127) - 1
+        self.halfmove = state >> 15
+        frm = move & 63
+        to = move >> 6 & 63
+        them = self.turn
+        us = them ^ 1
+        bb, occ, mailbox = self.bb, self.occ, self.mailbox
+        from_bit, to_bit = 1 << frm, 1 << to
+        piece = mailbox[to]
+        if move >> 12:
+            if move >> 12 & 7:
+                bb[piece] ^= to_bit
+                piece = PAWN | us << 3
+                bb[piece] ^= to_bit
+            if move & EN_PASSANT:
+                square = to - 8 if us == WHITE else to + 8
+                pawn = PAWN | them << 3
+                bb[pawn] ^= 1 << square
+                occ[them] ^= 1 << square
+                mailbox[square] = pawn
+            elif move & CASTLING:
+                rook_from, rook_to = ROOK_CASTLING_SQUARES[to]
+                rook = mailbox[rook_to]
+                bb[rook] ^= 1 << rook_from | 1 << rook_to
+                occ[us] ^= 1 << rook_from | 1 << rook_to
+                mailbox[rook_to] = 0
+                mailbox[rook_from] = rook
+        bb[piece] ^= from_bit | to_bit
+        occ[us] ^= from_bit | to_bit
+        mailbox[frm] = piece
+        mailbox[to] = captured
+        if captured:
+            bb[captured] ^= to_bit
+            occ[them] ^= to_bit
+        self.occupied = occ[0] | occ[1]
+        self.turn = us
+        self.ply -= 1
+
+    def is_insufficient_material(self):
+        """Neither side can mate, by python-chess's rules"""
+        bb = self.bb
+        if bb[PAWN] | bb[PAWN | 8] | bb[ROOK] | bb[ROOK | 8] | bb[QUEEN] | bb[QUEEN | 8]:
+            return False
+        knights = bb[KNIGHT] | bb[KNIGHT | 8]
+        bishops = bb[BISHOP] | bb[BISHOP | 8]
+        for color in (WHITE, BLACK):
+            own = self.occ[color]
+            if own & knights:
+                kings = bb[KING] | bb[KING | 8]
+                if own.bit_count() > 2 or self.occ[color ^ 1] & ~kings:
+                    return False
+            elif own & bishops:
+                same_color = not bishops & chess.BB_DARK_SQUARES or not bishops & chess.BB_LIGHT_SQUARES
+                if not same_color or knights:
+                    return False
+        return True
+
+    def is_draw(self):
+        """Drawn by insufficient material, the 75-move rule or fivefold
+        repetition (the draws that end a game without a claim)"""
+        if self.halfmove >= 150 or self.is_insufficient_material():
+            return True
+        if self.halfmove >= 16:
+            key = self.zobrist()
+            nkeys = self.nkeys
+            return self.keys[max(0, nkeys - self.halfmove):nkeys].count(key) >= 4
+        return False
+
+    def terminal_score(self):
+        """Score when there are no legal moves, as evaluate_terminal"""
+        if self.in_check():
+            score = MATE_SCORE - self.ply
+            return -score if self.turn == WHITE else score
+        return 0.0
+
+    def evaluate(self):
+        """Same score as evaluate_board: material and piece-square tables
+        plus mobility of minor and major pieces"""
+        bb, occupied = self.bb, self.occupied
+        score = self.score
+        mobility = 0
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            c = color << 3
+            not_own = ~self.occ[color]
+            count = 0
+            pieces = bb[KNIGHT | c]
+            while pieces:
+                square = pieces.bit_length() - 1
+                pieces ^= 1 << square
+                count += (KNIGHT_ATTACKS[square] & not_own).bit_count()
+            pieces = bb[BISHOP | c]
+            while pieces:
+                square = pieces.bit_length() - 1
+                pieces ^= 1 << square
+                count += (DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied] & not_own).bit_count()
+            pieces = bb[ROOK | c]
+            while pieces:
+                square = pieces.bit_length() - 1
+                pieces ^= 1 << square
+                count += ((RANK_ATTACKS[square][RANK_MASKS[square] & occupied]
+                           | FILE_ATTACKS[square][FILE_MASKS[square] & occupied]) & not_own).bit_count()
+            pieces = bb[QUEEN | c]
+            while pieces:
+                square = pieces.bit_length() - 1
+                pieces ^= 1 << square
+                count += ((DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied]
+                           | RANK_ATTACKS[square][RANK_MASKS[square] & occupied]
+                           | FILE_ATTACKS[square][FILE_MASKS[square] & occupied]) & not_own).bit_count()
+            mobility += sign * count
+        return (score + MOBILITY_WEIGHT * mobility) / 100.0
+
+    def mobility_terms(self):
+        """Mobility as evaluate counts it, per piece, for evaluate_child:
+        (total, [(square, square bit | attacked squares, signed count), ...])"""
+        bb, occupied = self.bb, self.occupied
+        total = 0
+        terms = []
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            c = color << 3
+            not_own = ~self.occ[color]
+            for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+                pieces = bb[piece_type | c]
+                while pieces:
+                    square = pieces.bit_length() - 1
+                    pieces ^= 1 << square
+                    if piece_type == KNIGHT:
+                        attacks = KNIGHT_ATTACKS[square]
+                    else:
+                        attacks = slider_attacks(piece_type, square, occupied)
+                    count = sign * (attacks & not_own).bit_count()
+                    terms.append((square, attacks | 1 << square, count))
+                    total += count
+        return total, terms
+
+    def evaluate_child(self, total, terms, occ):
+        """Same score as evaluate, for a position one move after the one
+        whose mobility_terms and occ lists are given.
+
+        A piece's count can only change if the move changed a square it
+        stands on or attacks (for a slider the attacked squares include its
+        first blocker, and squares behind a blocker cannot matter), so only
+        those pieces and the ones on changed squares are counted again.
+        """
+        changed = (self.occ[0] ^ occ[0]) | (self.occ[1] ^ occ[1])
+        mobility = total
+        recount = changed
+        for square, reach, count in terms:
+            if reach & changed:
+                mobility -= count
+                recount |= 1 << square
+        bb, occupied = self.bb, self.occupied
+        for color, sign in ((WHITE, 1), (BLACK, -1)):
+            c = color << 3
+            not_own = ~self.occ[color]
+            for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+                pieces = bb[piece_type | c] & recount
+                while pieces:
+                    square = pieces.bit_length() - 1
+                    pieces ^= 1 << square
+                    if piece_type == KNIGHT:
+                        attacks = KNIGHT_ATTACKS[square]
+                    else:
+                        attacks = slider_attacks(piece_type, square, occupied)
+                    mobility += sign * (attacks & not_own).bit_count()
+        return (self.score + MOBILITY_WEIGHT * mobility) / 100.0
+
+    def perft(self, depth):
+        """Number of leaf positions depth plies ahead"""
+        moves = self.legal_moves()
+        if depth <= 1:
+            return len(moves) if depth == 1 else 1
+        nodes = 0
+        for move in moves:
+            self.make(move)
+            nodes += self.perft(depth - 1)
+            self.unmake()
+        return nodes
+
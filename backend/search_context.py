@@ -0,0 +1,87 @@
+# search_context.py
+
+import time
+
+from evaluation import evaluate_board
+from move_ordering import MoveOrderer
+
+# Every EVAL_SAMPLE_RATE-th leaf evaluation is timed
+EVAL_SAMPLE_RATE = 64
+
+
+class SearchAborted(Exception):
+    """Raised inside a search when its time or node budget runs out"""
+
+
+class SearchContext:
+    """Per-search bookkeeping: node and cutoff counts, move ordering tables
+    and the optional time/node budget.
+
+    alpha_beta calls visit() once per node; once the budget is spent, or
+    the optional cancel_event is set, it raises SearchAborted, which
+    unwinds the current iteration.
+    """
+
+    def __init__(self, movetime_ms=None, max_nodes=None, cancel_event=None):
+        self.start = time.monotonic()
+        self.deadline = self.start + movetime_ms / 1000.0 if movetime_ms is not None else None
+        self.max_nodes = max_nodes
+        self.cancel_event = cancel_event
+        self.nodes = 0
+        self.root_ply = None
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.leaf_evals = 0
+        self.eval_samples = []
+        self.enforce_limits = True
+        self.ordering = MoveOrderer()
+
+    def visit(self):
+        self.nodes += 1
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise SearchAborted()
+        if not self.enforce_limits:
+            return
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchAborted()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def record_cutoff(self, board, move, depth, move_index):
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if isinstance(move, int):
+            self.ordering.record_code_cutoff(board, move, depth)
+        else:
+            self.ordering.record_cutoff(board, move, depth)
+
+    def evaluate(self, board, scorer=evaluate_board, *args):
+        """scorer(board, *args) (evaluate_board by default) for a leaf,
+        counted and sampled for timing"""
+        self.leaf_evals += 1
+        if self.leaf_evals % EVAL_SAMPLE_RATE:
+            return scorer(board, *args)
+        start = time.perf_counter()
+        score = scorer(board, *args)
+        self.eval_samples.append(time.perf_counter() - start)
+        return score
+
+    def elapsed_ms(self):
+        return (time.monotonic() - self.start) * 1000.0
+
+    def stats(self):
+        """Summary of the search so far, as returned by the API"""
+        elapsed_ms = self.elapsed_ms()
+        return {
+            'nodes': self.nodes,
+            'nps': round(self.nodes * 1000 / elapsed_ms) if elapsed_ms > 0 else None,
+            'leaf_evals': self.leaf_evals,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            'time_ms': round(elapsed_ms),
+        }
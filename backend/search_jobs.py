@@ -0,0 +1,136 @@
+# search_jobs.py
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from search_context import SearchAborted
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+FINISHED = (DONE, CANCELLED, FAILED)
+
+# Queued after the last progress report of a job
+_END_OF_UPDATES = object()
+
+
+class JobQueueFull(Exception):
+    """Raised when every job slot is taken by an unfinished job"""
+
+
+class SearchJob:
+    """A search submitted through the job API, with its progress so far"""
+
+    def __init__(self, params):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = QUEUED
+        self.partial = None
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.updates = queue.Queue()
+        self.created = time.time()
+        self.finished = None
+
+    def report(self, **progress):
+        """Record the latest completed iteration and pass it to any listener"""
+        self.partial = progress
+        self.updates.put(progress)
+
+    def events(self, timeout=None):
+        """Yield progress reports as they arrive until the job finishes.
+
+        Yields None whenever timeout seconds pass without a report.
+        """
+        while True:
+            try:
+                progress = self.updates.get(timeout=timeout)
+            except queue.Empty:
+                yield None
+                continue
+            if progress is _END_OF_UPDATES:
+                return
+            yield progress
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'partial': self.partial,
+            'result': self.result,
+            'error': self.error,
+            'move': self.result.get('move') if self.result else None,
+        }
+
+
+class JobManager:
+    """Runs search jobs on a bounded thread pool.
+
+    Searches check the job's cancel event at every node, so a cancelled
+    job stops within one node's work. At most max_jobs jobs are kept;
+    the oldest finished ones are forgotten first.
+    """
+
+    def __init__(self, runner, max_workers=2, max_jobs=256):
+        self.runner = runner
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, params):
+        job = SearchJob(params)
+        with self.lock:
+            self._evict()
+            if len(self.jobs) >= self.max_jobs:
+                raise JobQueueFull()
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return job
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            return
+        job.status = RUNNING
+        try:
+            job.result = self.runner(job)
+        except SearchAborted:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, CANCELLED if job.cancel_event.is_set() else DONE)
+
+    def _finish(self, job, status):
+        if job.finished is not None:
+            return
+        job.status = status
+        job.finished = time.time()
+        job.updates.put(_END_OF_UPDATES)
+
+    def _evict(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]:
+            if len(self.jobs) < self.max_jobs:
+                break
+            del self.jobs[job_id]
@@ -0,0 +1,69 @@
+# search_worker.py
+"""Tasks run on the search and analysis process pools.
+
+Workers start from a fresh interpreter and import only this module and the
+search code. Submitting functions from app instead would make every worker
+import app, which creates and patches the database tables and starts a
+game writer.
+"""
+
+import math
+
+import chess
+
+from evaluation import EvalBoard
+from game_analysis import analyze_game
+from search import TT_SIZE_MB, alpha_beta, iterative_deepening, pvs, search_request
+from search_context import SearchContext
+from transposition import TranspositionTable
+
+# Each worker process keeps its own transposition table between tasks
+_worker_tt = None
+
+
+def _table():
+    global _worker_tt
+    if _worker_tt is None:
+        _worker_tt = TranspositionTable(TT_SIZE_MB)
+    return _worker_tt
+
+
+def search_root_moves(fen, moves, depth, engine):
+    """Search a share of the root moves, returning the best of them.
+
+    Returns (move uci, White-relative score, nodes searched).
+    """
+    tt = _table()
+    tt.new_search()
+    board = EvalBoard(fen)
+    ctx = SearchContext()
+    white = board.turn == chess.WHITE
+    sign = 1 if white else -1
+    best_move, best_score = None, -math.inf
+    for uci in moves:
+        board.push(chess.Move.from_uci(uci))
+        if engine == 'pvs':
+            score = -pvs(board, depth - 1, -math.inf, -best_score, tt=tt, ctx=ctx)[1]
+        elif white:
+            score = alpha_beta(board, depth - 1, best_score, math.inf, False, tt=tt, ctx=ctx)[1]
+        else:
+            score = -alpha_beta(board, depth - 1, -math.inf, -best_score, True, tt=tt, ctx=ctx)[1]
+        board.pop()
+        if best_move is None or score > best_score:
+            best_move, best_score = uci, score
+    return best_move, sign * best_score, ctx.nodes
+
+
+def batch_search(data):
+    """Search one /api/moves position with the worker's table"""
+    return search_request(dict(data, workers=1), EvalBoard(data.get('fen')), _table())[0]
+
+
+def _analysis_search(board, depth, tt):
+    move, score, _ = iterative_deepening(board, depth, tt=tt)
+    return move, score
+
+
+def analyze_moves(moves, depth):
+    """Analysis rows for a game given as UCI moves"""
+    return analyze_game([chess.Move.from_uci(uci) for uci in moves], depth, _analysis_search, TT_SIZE_MB)
@@ -0,0 +1,390 @@
+# tablebase.py
+
+import argparse
+import mmap
+import os
+import time
+from array import array
+
+import chess
+
+from evaluation import MATE_SCORE
+
+# Endings we can generate: pieces of the stronger side besides its king.
+# Tables are built with the stronger side as White; Black is probed mirrored.
+ENDINGS = {
+    'KQK': [chess.QUEEN],
+    'KRK': [chess.ROOK],
+    'KPK': [chess.PAWN],
+    'KBNK': [chess.BISHOP, chess.KNIGHT],
+}
+
+# Most pieces (kings included) in any covered position
+MAX_PIECES = 4
+
+# KPK promotes into these, so they are generated first
+BUILD_ORDER = ['KQK', 'KRK', 'KPK', 'KBNK']
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+# Stronger king squares used for pawnless tables: a1-d1-d4 triangle
+TRIANGLE = [chess.A1, chess.B1, chess.C1, chess.D1, chess.B2, chess.C2, chess.D2, chess.C3, chess.D3, chess.D4]
+TRIANGLE_INDEX = {square: index for index, square in enumerate(TRIANGLE)}
+
+# The eight board symmetries as square maps (pawnless positions only)
+def _transpose(square):
+    return chess.square(chess.square_rank(square), chess.square_file(square))
+
+SYMMETRIES = []
+for _flip in (0, 7, 56, 63):
+    SYMMETRIES.append([square ^ _flip for square in chess.SQUARES])
+    SYMMETRIES.append([_transpose(square ^ _flip) for square in chess.SQUARES])
+IDENTITY = [SYMMETRIES[0]]
+
+
+def _attacks(piece_type, square, occupied, color=chess.WHITE):
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[color][square]
+    attacks = 0
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                    | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks
+
+
+class Ending:
+    """Index arithmetic for one ending.
+
+    A position is (turn, squares) where squares lists the stronger king,
+    the lone king, then the stronger side's other pieces, and turn is 0
+    when the stronger side (White) is to move and 1 otherwise.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.pieces = ENDINGS[name]
+        self.types = [chess.KING, chess.KING] + self.pieces
+        self.has_pawns = chess.PAWN in self.pieces
+        self.symmetries = IDENTITY if self.has_pawns else SYMMETRIES
+        king_squares = 64 if self.has_pawns else len(TRIANGLE)
+        self.size = 2 * king_squares * 64 ** (len(self.types) - 1)
+
+    def index(self, turn, squares):
+        """Index of the canonical form of a position, or None if the
+        stronger king cannot be brought into the indexed region"""
+        best = None
+        for symmetry in self.symmetries:
+            king = symmetry[squares[0]]
+            if self.has_pawns:
+                value = king
+            elif king in TRIANGLE_INDEX:
+                value = TRIANGLE_INDEX[king]
+            else:
+                continue
+            for square in squares[1:]:
+                value = value * 64 + symmetry[square]
+            value = value * 2 + turn
+            if best is None or value < best:
+                best = value
+        return best
+
+    def decode(self, index):
+        turn = index & 1
+        index >>= 1
+        squares = []
+        for _ in range(len(self.types) - 1):
+            squares.append(index & 63)
+            index >>= 6
+        king = index if self.has_pawns else TRIANGLE[index]
+        squares.append(king)
+        squares.reverse()
+        return turn, squares
+
+    def strong_attacks(self, squares, occupied):
+        """Squares attacked by the stronger side (including its own pieces)"""
+        attacks = chess.BB_KING_ATTACKS[squares[0]]
+        for piece_type, square in zip(self.pieces, squares[2:]):
+            attacks |= _attacks(piece_type, square, occupied)
+        return attacks
+
+    def is_valid(self, turn, squares):
+        if len(set(squares)) != len(squares):
+            return False
+        for piece_type, square in zip(self.pieces, squares[2:]):
+            if piece_type == chess.PAWN and chess.square_rank(square) in (0, 7):
+                return False
+        if chess.BB_KING_ATTACKS[squares[0]] & chess.BB_SQUARES[squares[1]]:
+            return False
+        if turn == 0:
+            # The lone king may not be in check with White to move
+            occupied = 0
+            for square in squares:
+                occupied |= chess.BB_SQUARES[square]
+            if self.strong_attacks(squares, occupied) & chess.BB_SQUARES[squares[1]]:
+                return False
+        return True
+
+
+class TablebaseGenerator:
+    """Retrograde analysis of one ending into a distance-to-mate table.
+
+    Each byte holds 0 for draws and unused indices, otherwise 1 + the
+    number of plies to mate; the stronger side wins every decided
+    position, so White-to-move entries are wins and Black-to-move
+    entries are losses.
+    """
+
+    def __init__(self, name, tablebases=None):
+        self.ending = Ending(name)
+        self.tablebases = tablebases
+        self.values = bytearray(self.ending.size)
+        self.counters = bytearray(self.ending.size)
+        self.buckets = []
+
+    def _push(self, dtm, index):
+        while len(self.buckets) <= dtm:
+            self.buckets.append(array('I'))
+        self.buckets[dtm].append(index)
+
+    def generate(self, progress=None):
+        ending = self.ending
+        for index in range(1, ending.size, 2):
+            turn, squares = ending.decode(index)
+            if ending.index(turn, squares) != index or not ending.is_valid(turn, squares):
+                continue
+            self._count_defender_moves(index, squares)
+        if ending.has_pawns:
+            for index in range(0, ending.size, 2):
+                turn, squares = ending.decode(index)
+                if ending.index(turn, squares) == index and ending.is_valid(turn, squares):
+                    self._seed_promotions(index, squares)
+
+        dtm = 0
+        while dtm < len(self.buckets):
+            for index in self.buckets[dtm]:
+                if self.values[index]:
+                    continue
+                self.values[index] = min(dtm + 1, 255)
+                turn, squares = ending.decode(index)
+                if turn == 1:
+                    for pred in self._predecessors(0, squares):
+                        if not self.values[pred]:
+                            self._push(dtm + 1, pred)
+                else:
+                    for pred in set(self._predecessors(1, squares)):
+                        if self.values[pred] or not self.counters[pred]:
+                            continue
+                        self.counters[pred] -= 1
+                        if self.counters[pred] == 0:
+                            self._push(dtm + 1, pred)
+            self.buckets[dtm] = None
+            if progress:
+                progress(dtm)
+            dtm += 1
+        return self.values
+
+    def _count_defender_moves(self, index, squares):
+        """Lone king to move: count distinct successors, or seed a mate"""
+        ending = self.ending
+        king = squares[1]
+        occupied = 0
+        for square in squares:
+            occupied |= chess.BB_SQUARES[square]
+        # Slide attacks through the lone king so it cannot step back along a line
+        attacked = ending.strong_attacks(squares, occupied & ~chess.BB_SQUARES[king])
+        children = set()
+        for target in chess.scan_forward(chess.BB_KING_ATTACKS[king] & ~attacked):
+            if target in squares:
+                children.add(('capture', target))
+            else:
+                child = list(squares)
+                child[1] = target
+                children.add(ending.index(0, child))
+        if children:
+            self.counters[index] = len(children)
+        elif attacked & chess.BB_SQUARES[king]:
+            self._push(0, index)
+
+    def _seed_promotions(self, index, squares):
+        """KPK: White to move wins if a promotion reaches a lost KQK/KRK position"""
+        pawn = squares[2]
+        if chess.square_rank(pawn) != 6 or pawn + 8 in squares[:2]:
+            return
+        best = None
+        for piece in (chess.QUEEN, chess.ROOK):
+            name = 'KQK' if piece == chess.QUEEN else 'KRK'
+            child = [squares[0], squares[1], pawn + 8]
+            result = self.tablebases.probe_squares(name, 1, child)
+            if result is not None and result[0] == LOSS and (best is None or result[1] < best):
+                best = result[1]
+        if best is not None:
+            self._push(best + 1, index)
+
+    def _predecessors(self, turn, squares):
+        """Indices of positions (turn to move) one move before this one"""
+        ending = self.ending
+        occupied = 0
+        for square in squares:
+            occupied |= chess.BB_SQUARES[square]
+        if turn == 1:
+            movers = [1]
+            types = [chess.KING]
+        else:
+            movers = [0] + list(range(2, len(squares)))
+            types = [chess.KING] + self.ending.pieces
+        for slot, piece_type in zip(movers, types):
+            square = squares[slot]
+            if piece_type == chess.PAWN:
+                origins = []
+                if not occupied & chess.BB_SQUARES[square - 8] and chess.square_rank(square) > 1:
+                    origins.append(square - 8)
+                    if chess.square_rank(square) == 3 and not occupied & chess.BB_SQUARES[square - 16]:
+                        origins.append(square - 16)
+            else:
+                origins = chess.scan_forward(_attacks(piece_type, square, occupied) & ~occupied)
+            for origin in origins:
+                pred = list(squares)
+                pred[slot] = origin
+                if ending.is_valid(turn, pred):
+                    yield ending.index(turn, pred)
+
+    def write(self, path):
+        with open(path, 'wb') as handle:
+            handle.write(self.values)
+
+
+class Tablebases:
+    """Memory-mapped distance-to-mate tables for the endings in ENDINGS.
+
+    Lookups cost one index computation and one byte read. Positions with
+    only kings and at most one minor piece are reported as draws.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.endings = {}
+        self.tables = {}
+        self.signatures = {}
+        for name in ENDINGS:
+            path = os.path.join(directory, f'{name}.bin')
+            if os.path.exists(path):
+                self.add_table(name, path)
+
+    def add_table(self, name, path):
+        ending = Ending(name)
+        with open(path, 'rb') as handle:
+            table = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(table) != ending.size:
+            raise ValueError(f'{path}: expected {ending.size} bytes, found {len(table)}')
+        self.endings[name] = ending
+        self.tables[name] = table
+        self.signatures[tuple(sorted(ending.pieces))] = name
+
+    def __len__(self):
+        return len(self.tables)
+
+    def probe_squares(self, name, turn, squares):
+        """(result, plies to mate) for the side to move, in table space"""
+        ending = self.endings.get(name)
+        if ending is None:
+            return None
+        value = self.tables[name][ending.index(turn, squares)]
+        if not value:
+            return DRAW, 0
+        return (WIN if turn == 0 else LOSS), value - 1
+
+    def probe(self, board):
+        """(result, plies to mate) for the side to move, or None if the
+        position is not covered"""
+        if chess.popcount(board.occupied) > MAX_PIECES or board.castling_rights:
+            return None
+        white = board.occupied_co[chess.WHITE] & ~board.kings
+        black = board.occupied_co[chess.BLACK] & ~board.kings
+        if white and black:
+            return None
+        strong = chess.WHITE if white else chess.BLACK
+        pieces = sorted(board.piece_type_at(square) for square in chess.scan_forward(white | black))
+        name = self.signatures.get(tuple(pieces))
+        if name is None:
+            if board.is_insufficient_material():
+                return DRAW, 0
+            return None
+        ending = self.endings[name]
+        flip = 0 if strong == chess.WHITE else 56
+        squares = [board.king(strong) ^ flip, board.king(not strong) ^ flip]
+        for piece_type in ending.pieces:
+            squares.append(next(iter(board.pieces(piece_type, strong))) ^ flip)
+        turn = 0 if board.turn == strong else 1
+        return self.probe_squares(name, turn, squares)
+
+    def probe_score(self, board):
+        """Search score (White-relative, same scale as evaluate_terminal)"""
+        result = self.probe(board)
+        if result is None:
+            return None
+        outcome, dtm = result
+        if outcome == DRAW:
+            return 0.0
+        score = MATE_SCORE - (board.ply() + dtm)
+        if outcome == LOSS:
+            score = -score
+        return score if board.turn == chess.WHITE else -score
+
+    def best_move(self, board):
+        """Perfect-play move for a covered position, or None: the fastest
+        win, else a draw, else the slowest loss"""
+        if self.probe(board) is None:
+            return None
+        best_move, best_key = None, None
+        for move in board.legal_moves:
+            board.push(move)
+            result = self.probe(board)
+            board.pop()
+            if result is None:
+                return None
+            outcome, dtm = result
+            # The child is scored for the opponent, so their loss is our win
+            key = (-outcome, dtm if outcome == WIN else -dtm)
+            if best_key is None or key > best_key:
+                best_move, best_key = move, key
+        return best_move
+
+
+def generate(names, directory, verbose=True):
+    os.makedirs(directory, exist_ok=True)
+    tablebases = Tablebases(directory)
+    for name in BUILD_ORDER:
+        if name not in names:
+            continue
+        start = time.monotonic()
+        generator = TablebaseGenerator(name, tablebases)
+        generator.generate()
+        path = os.path.join(directory, f'{name}.bin')
+        generator.write(path)
+        tablebases.add_table(name, path)
+        if verbose:
+            print(f'{name}: {generator.ending.size} entries in {time.monotonic() - start:.1f}s -> {path}')
+    return tablebases
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate endgame distance-to-mate tables')
+    parser.add_argument('endings', nargs='*', default=BUILD_ORDER, help=f'any of {", ".join(BUILD_ORDER)}')
+    parser.add_argument('--dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases'))
+    args = parser.parse_args()
+    names = set(args.endings)
+    if 'KPK' in names:
+        names |= {'KQK', 'KRK'}
+    generate(names, args.dir)
+
+
+if __name__ == '__main__':
+    main()
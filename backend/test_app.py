@@ -1,8 +1,24 @@
 import unittest
 import chess
+import chess.polyglot
 import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
 
-from app import app, evaluate_board, minimax, alpha_beta
+from app import app, depth_label, engine_label, evaluate_board, minimax, alpha_beta, iterative_deepening, pvs, parallel_search
+from search_context import SearchContext
+from move_ordering import MoveOrderer
+from evaluation import EvalBoard, material_score, evaluate_terminal
+from result_cache import ResultCache
+from metrics import Registry
+from game_writer import GameWriter
+from transposition import ENTRY_BYTES, TranspositionTable, EXACT, LOWER
+from move_encoding import encode_move
 
 class ChessEngineTests(unittest.TestCase):
 
@@ -21,6 +37,26 @@ class ChessEngineTests(unittest.TestCase):
         self.assertIsInstance(move, chess.Move)
         self.assertIsInstance(score, float)
 
+    def test_minimax_matches_python_chess_search(self):
+        def reference(board, depth):
+            if board.is_game_over():
+                return evaluate_terminal(board)
+            if depth == 0:
+                return evaluate_board(board)
+            scores = []
+            for move in board.legal_moves:
+                board.push(move)
+                scores.append(reference(board, depth - 1))
+                board.pop()
+            return max(scores) if board.turn == chess.WHITE else min(scores)
+
+        for fen in (self.initial_fen, "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 b - - 3 8",
+                    "8/8/3p4/1Pp4r/1K3p2/6k1/4P1P1/1R6 w - c6 0 3"):
+            board = chess.Board(fen)
+            move, score = minimax(board, 2, board.turn == chess.WHITE)
+            self.assertEqual(score, reference(board, 2))
+            self.assertEqual(board.fen(), fen)
+
     def test_alpha_beta_move_generation(self):
         move, score = alpha_beta(self.board, depth=2, alpha=-float('inf'), beta=float('inf'), maximizing_player=True)
         self.assertIsInstance(move, chess.Move)
@@ -42,6 +78,247 @@ class ChessEngineTests(unittest.TestCase):
         self.assertTrue(board.is_game_over() or score > 0)
 
 
+class IncrementalEvaluationTests(unittest.TestCase):
+
+    def test_incremental_score_tracks_push_and_pop(self):
+        # Castling, en passant, capture and promotion in one line
+        board = EvalBoard("r3k2r/1P3p2/8/8/4p3/8/3P1P2/R3K2R w KQkq - 0 1")
+        for uci in ["e1g1", "e8g8", "d2d4", "e4d3", "b7a8q", "f8a8"]:
+            board.push_uci(uci)
+            self.assertEqual(board.score, material_score(board))
+        while board.move_stack:
+            board.pop()
+            self.assertEqual(board.score, material_score(board))
+
+    def test_evaluation_ignores_side_to_move(self):
+        white = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+        black = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 4 4")
+        self.assertEqual(evaluate_board(white), evaluate_board(black))
+        self.assertEqual(evaluate_board(EvalBoard(white.fen())), evaluate_board(white))
+
+    def test_terminal_scores(self):
+        mated = chess.Board("rnbqkbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+        self.assertLess(evaluate_terminal(mated), -100)
+        stalemate = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(evaluate_terminal(stalemate), 0)
+
+
+class TranspositionTableTests(unittest.TestCase):
+
+    def test_probe_returns_stored_entry(self):
+        tt = TranspositionTable(size_mb=1)
+        move = encode_move(chess.Move.from_uci("e7e8q"))
+        tt.store(12345, 3, -0.5, LOWER, move)
+        entry = tt.probe(12345)
+        self.assertEqual((entry.depth, entry.score, entry.flag, entry.move), (3, -0.5, LOWER, move))
+        self.assertIsNone(tt.probe(54321))
+        tt.store(2 ** 64 - 1, 0, 0.0, EXACT, None)
+        self.assertIsNone(tt.probe(2 ** 64 - 1).move)
+
+    def test_depth_preferred_replacement(self):
+        tt = TranspositionTable(size_mb=1)
+        key = 7
+        other = key + tt.size  # same slot, different key
+        tt.store(key, 5, 1.0, EXACT, None)
+        tt.store(other, 2, 0.0, LOWER, None)
+        self.assertIsNotNone(tt.probe(key))
+        self.assertIsNone(tt.probe(other))
+        # Entries from an older search can always be replaced
+        tt.new_search()
+        tt.store(other, 2, 0.0, LOWER, None)
+        self.assertIsNotNone(tt.probe(other))
+
+    def test_size_is_capped(self):
+        tt = TranspositionTable(size_mb=1)
+        for key in range(tt.size * 3):
+            tt.store(key, 1, 0.0, EXACT, None)
+        self.assertEqual(len(tt), tt.size)
+
+    def test_memory_matches_size(self):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            tt = TranspositionTable(size_mb=16)
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(used, 16 * 1024 * 1024)
+        self.assertLess(abs(used - tt.size * ENTRY_BYTES), 4096)
+
+    def test_alpha_beta_with_table_matches_plain_search(self):
+        board = chess.Board("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+        _, plain = alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'), maximizing_player=True)
+        tt = TranspositionTable(size_mb=1)
+        _, cached = alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'), maximizing_player=True, tt=tt)
+        self.assertAlmostEqual(plain, cached)
+        # A repeated search is answered from the table
+        tt.new_search()
+        _, repeated = alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'), maximizing_player=True, tt=tt)
+        self.assertAlmostEqual(plain, repeated)
+        self.assertGreater(tt.hits, 0)
+
+
+    def test_root_cutoff_ignores_illegal_table_move(self):
+        board = chess.Board()
+        for search in (lambda tt: alpha_beta(board, 2, -float('inf'), float('inf'), True, tt=tt),
+                       lambda tt: pvs(board, 2, -float('inf'), float('inf'), tt=tt)):
+            tt = TranspositionTable(1)
+            tt.store(chess.polyglot.zobrist_hash(board), 10, 5.0, EXACT, encode_move(chess.Move.from_uci('a1a8')))
+            move, score = search(tt)
+            self.assertIn(move, board.legal_moves)
+            self.assertNotEqual(score, 5.0)
+
+
+class IterativeDeepeningTests(unittest.TestCase):
+
+    def test_node_budget_stops_search(self):
+        board = chess.Board()
+        ctx = SearchContext(max_nodes=500)
+        move, score, depth = iterative_deepening(board, 10, ctx=ctx)
+        self.assertIn(move, board.legal_moves)
+        self.assertGreaterEqual(depth, 1)
+        self.assertLess(depth, 10)
+
+    def test_completes_requested_depth_without_budget(self):
+        board = chess.Board()
+        ctx = SearchContext()
+        move, score, depth = iterative_deepening(board, 2, ctx=ctx)
+        self.assertEqual(depth, 2)
+        self.assertGreater(ctx.nodes, 0)
+
+
+class MoveOrderingTests(unittest.TestCase):
+
+    def test_hash_move_then_captures_first(self):
+        # White can take the queen on d5 with the pawn or the knight
+        board = chess.Board("4k3/8/8/3q4/4P3/2N5/8/4K3 w - - 0 1")
+        hash_move = chess.Move.from_uci("e1f1")
+        moves = MoveOrderer().order(board, list(board.legal_moves), hash_move)
+        self.assertEqual(moves[0], hash_move)
+        self.assertEqual(moves[1], chess.Move.from_uci("e4d5"))
+        self.assertEqual(moves[2], chess.Move.from_uci("c3d5"))
+
+    def test_killer_and_history_moves_rank_above_quiet_moves(self):
+        board = chess.Board()
+        orderer = MoveOrderer()
+        killer = chess.Move.from_uci("g1f3")
+        orderer.record_cutoff(board, killer, 3)
+        moves = orderer.order(board, list(board.legal_moves))
+        self.assertEqual(moves[0], killer)
+
+    def test_cutoff_statistics(self):
+        board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+        ctx = SearchContext()
+        alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'), maximizing_player=True, ctx=ctx)
+        stats = ctx.stats()
+        self.assertEqual(stats['nodes'], ctx.nodes)
+        self.assertGreater(stats['cutoffs'], 0)
+        self.assertGreater(stats['first_move_cutoff_rate'], 0.5)
+
+
+class PrincipalVariationSearchTests(unittest.TestCase):
+
+    def test_pvs_matches_alpha_beta_score(self):
+        for fen in [chess.STARTING_FEN,
+                    "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 b - - 3 8"]:
+            board = chess.Board(fen)
+            _, expected = alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'),
+                                     maximizing_player=board.turn == chess.WHITE)
+            _, score = pvs(board, 3, -float('inf'), float('inf'))
+            sign = 1 if board.turn == chess.WHITE else -1
+            self.assertAlmostEqual(sign * score, expected)
+
+    def test_pvs_iterative_deepening_with_aspiration(self):
+        board = chess.Board("r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
+        tt = TranspositionTable(size_mb=1)
+        _, expected = alpha_beta(board, depth=4, alpha=-float('inf'), beta=float('inf'), maximizing_player=True)
+        move, score, depth = iterative_deepening(board, 4, tt=tt, engine='pvs')
+        self.assertIn(move, board.legal_moves)
+        self.assertEqual(depth, 4)
+        self.assertAlmostEqual(score, expected)
+
+    def test_pvs_visits_fewer_nodes_than_alpha_beta(self):
+        for fen in ["r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+                    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                    "2rq1rk1/pp1bppbp/2np1np1/8/3NP3/1BN1BP2/PPPQ2PP/2KR3R b - - 0 11"]:
+            results = {}
+            for engine in ('alphabeta', 'pvs'):
+                ctx = SearchContext()
+                move, score, _ = iterative_deepening(chess.Board(fen), 4, tt=TranspositionTable(size_mb=1),
+                                                     ctx=ctx, engine=engine)
+                results[engine] = (move, round(score, 6), ctx.nodes)
+            self.assertEqual(results['pvs'][:2], results['alphabeta'][:2], fen)
+            self.assertLess(results['pvs'][2], results['alphabeta'][2], fen)
+
+    def test_pvs_finds_mate(self):
+        board = chess.Board("6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1")
+        move, _, _ = iterative_deepening(board, 3, engine='pvs')
+        self.assertEqual(move, chess.Move.from_uci("d1d8"))
+
+
+class ParallelSearchTests(unittest.TestCase):
+
+    def test_parallel_search_matches_serial_search(self):
+        board = chess.Board("r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 b - - 3 8")
+        _, expected = alpha_beta(board, depth=3, alpha=-float('inf'), beta=float('inf'), maximizing_player=False)
+        for engine in ('alphabeta', 'pvs'):
+            move, score, nodes = parallel_search(board, 3, workers=2, engine=engine)
+            self.assertIn(move, board.legal_moves)
+            self.assertAlmostEqual(score, expected)
+
+    def test_pool_tasks_do_not_import_app(self):
+        code = "import sys, search_worker; print(sorted({'app', 'flask', 'sqlalchemy'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        self.assertEqual(output.strip(), '[]')
+
+
+class ResultCacheTests(unittest.TestCase):
+
+    def test_lru_eviction_and_counters(self):
+        cache = ResultCache(max_size=2)
+        cache.put('a', {'move': 'e2e4'})
+        cache.put('b', {'move': 'd2d4'})
+        self.assertEqual(cache.get('a'), {'move': 'e2e4'})
+        cache.put('c', {'move': 'c2c4'})  # evicts b, the least recently used
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_key_ignores_move_counters(self):
+        board = chess.Board("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        later = chess.Board("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 4 3")
+        self.assertEqual(ResultCache.make_key(board, 'alphabeta', 4), ResultCache.make_key(later, 'alphabeta', 4))
+        self.assertNotEqual(ResultCache.make_key(board, 'alphabeta', 4), ResultCache.make_key(board, 'minimax', 4))
+
+    def test_sqlite_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.sqlite')
+            ResultCache(sqlite_path=path).put('k', {'move': 'g1f3'})
+            self.assertEqual(ResultCache(sqlite_path=path).get('k'), {'move': 'g1f3'})
+
+
+class MetricsTests(unittest.TestCase):
+
+    def test_text_exposition(self):
+        registry = Registry()
+        nodes = registry.counter('nodes_total', 'Nodes', ['engine'])
+        latency = registry.histogram('latency_seconds', 'Latency', ['engine'], buckets=(0.1, 1.0))
+        nodes.inc(5, engine='pvs')
+        nodes.inc(2, engine='pvs')
+        latency.observe(0.5, engine='pvs')
+        latency.observe(3.0, engine='pvs')
+        text = registry.render()
+        self.assertIn('# TYPE nodes_total counter', text)
+        self.assertIn('nodes_total{engine="pvs"} 7', text)
+        self.assertIn('latency_seconds_bucket{engine="pvs",le="0.1"} 0', text)
+        self.assertIn('latency_seconds_bucket{engine="pvs",le="1.0"} 1', text)
+        self.assertIn('latency_seconds_bucket{engine="pvs",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_sum{engine="pvs"} 3.5', text)
+        self.assertIn('latency_seconds_count{engine="pvs"} 2', text)
+
+
 class FlaskAPITests(unittest.TestCase):
 
     def setUp(self):
@@ -69,6 +346,115 @@ class FlaskAPITests(unittest.TestCase):
         self.assertIn("move", data)
         self.assertIsInstance(data['move'], str)
 
+    def test_api_move_reuses_game_table(self):
+        for _ in range(2):
+            response = self.client.post('/api/move', json={
+                "fen": self.fen,
+                "engine": "alphabeta",
+                "depth": 2,
+                "game_id": "tt-test"
+            })
+            data = json.loads(response.data)
+            self.assertIsInstance(data['move'], str)
+
+    def test_api_move_with_movetime(self):
+        response = self.client.post('/api/move', json={
+            "fen": self.fen,
+            "engine": "alphabeta",
+            "movetime_ms": 200
+        })
+        data = json.loads(response.data)
+        self.assertIsInstance(data['move'], str)
+        self.assertGreaterEqual(data['depth'], 1)
+        self.assertLess(data['time_ms'], 2000)
+
+    def test_api_move_pvs(self):
+        response = self.client.post('/api/move', json={
+            "fen": self.fen,
+            "engine": "pvs",
+            "depth": 3
+        })
+        data = json.loads(response.data)
+        self.assertIsInstance(data['move'], str)
+
+    def test_api_move_served_from_cache(self):
+        request = {"fen": "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+                   "engine": "alphabeta", "depth": 2}
+        first = json.loads(self.client.post('/api/move', json=request).data)
+        second = json.loads(self.client.post('/api/move', json=request).data)
+        self.assertEqual(first['move'], second['move'])
+        self.assertTrue(second.get('cached'))
+        stats = json.loads(self.client.get('/api/cache-stats').data)
+        self.assertGreaterEqual(stats['hits'], 1)
+
+    def test_api_moves_batch(self):
+        fens = ["r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+                "rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2"]
+        positions = [{"fen": fens[0], "engine": "pvs", "depth": 2},
+                     {"fen": fens[1], "engine": "alphabeta", "depth": 2},
+                     {"fen": "not a fen", "engine": "alphabeta", "depth": 2},
+                     {"fen": fens[0], "engine": "pvs", "depth": 2}]
+        results = json.loads(self.client.post('/api/moves', json=positions).data)['results']
+        self.assertEqual(len(results), 4)
+        for fen, result in zip(fens, results):
+            self.assertIn(chess.Move.from_uci(result['move']), chess.Board(fen).legal_moves)
+        self.assertIn('error', results[2])
+        self.assertEqual(results[3]['move'], results[0]['move'])
+        # Same answers one at a time
+        single = json.loads(self.client.post('/api/move', json=positions[1]).data)
+        self.assertEqual(single['move'], results[1]['move'])
+
+    def test_api_moves_ndjson_stream(self):
+        body = "\n".join(json.dumps({"fen": self.fen, "engine": "alphabeta", "depth": depth})
+                         for depth in (1, 2)) + "\n"
+        response = self.client.post('/api/moves?stream=1', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(sorted(line['index'] for line in lines), [0, 1])
+        self.assertTrue(all(isinstance(line['move'], str) for line in lines))
+
+    def test_api_moves_rejects_non_list(self):
+        response = self.client.post('/api/moves', json={"fen": self.fen})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_move_rejects_bad_workers(self):
+        for workers in ('two', 0, None):
+            response = self.client.post('/api/move', json={"fen": self.fen, "workers": workers})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('workers', json.loads(response.data)['error'])
+
+    def test_api_move_minimax_stats_count_every_leaf(self):
+        response = self.client.post('/api/move', json={
+            "fen": self.fen, "engine": "minimax", "depth": 2, "stats": True
+        })
+        stats = json.loads(response.data)['stats']
+        self.assertEqual((stats['nodes'], stats['leaf_evals']), (421, 400))
+
+    def test_metric_labels_are_bounded(self):
+        response = self.client.post('/api/move', json={"fen": self.fen, "engine": "bogus-engine", "depth": 1})
+        self.assertEqual(response.status_code, 200)
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertNotIn('bogus-engine', text)
+        self.assertIn('chess_move_request_seconds_count{engine="other",depth="1"}', text)
+        self.assertEqual([depth_label(depth) for depth in (3, 0, 999, True, "3")],
+                         ['3', 'other', 'other', 'other', 'other'])
+        self.assertEqual(depth_label(3, budget=True), 'budget')
+        self.assertEqual([engine_label(engine) for engine in (None, 'pvs', 'x')], ['alphabeta', 'pvs', 'other'])
+
+    def test_api_move_stats_and_metrics(self):
+        response = self.client.post('/api/move', json={
+            "fen": self.fen, "engine": "pvs", "depth": 3, "stats": True
+        })
+        stats = json.loads(response.data)['stats']
+        self.assertEqual(stats['depth'], 3)
+        self.assertGreater(stats['nodes'], 0)
+        self.assertGreater(stats['leaf_evals'], 0)
+        self.assertIn('nps', stats)
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertIn('chess_search_nodes_total{engine="pvs"}', text)
+        self.assertIn('chess_move_request_seconds_count{engine="pvs",depth="3"}', text)
+        self.assertIn('chess_result_cache_hits_total', text)
+
     def test_api_game_status(self):
         response = self.client.post('/api/game-status', json={
             "fen": self.fen
@@ -94,5 +480,97 @@ class FlaskAPITests(unittest.TestCase):
         self.assertTrue(isinstance(data["is_check"], bool))
         self.assertTrue(isinstance(data["is_game_over"], bool))
 
+class GameWriterTests(unittest.TestCase):
+
+    def test_batches_by_size_and_flushes_on_close(self):
+        batches = []
+        writer = GameWriter(batches.append, batch_size=3, flush_interval=60)
+        for index in range(7):
+            writer.enqueue({'n': index})
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        writer.enqueue({'n': 7})
+        writer.close()
+        self.assertEqual(batches[-1], [{'n': 7}])
+
+    def test_time_threshold(self):
+        batches = []
+        writer = GameWriter(batches.append, batch_size=100, flush_interval=0.05)
+        writer.enqueue({'n': 0})
+        for _ in range(100):
+            if batches:
+                break
+            time.sleep(0.01)
+        self.assertEqual(batches, [[{'n': 0}]])
+        writer.close()
+
+
+class GamesAPITests(unittest.TestCase):
+
+    def setUp(self):
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+        self.mode = f'paging-{uuid.uuid4().hex[:8]}'
+        self.ids = []
+        for index in range(5):
+            response = self.client.post('/api/save-game', json={
+                "gameMode": self.mode, "moves": "e2e4 e7e5", "finalFen": chess.STARTING_FEN,
+                "result": "1-0" if index % 2 else "0-1", "engineDepth": 2, "duration": index
+            })
+            self.ids.append(json.loads(response.data)['id'])
+
+    def test_deferred_saves_are_written_in_batches(self):
+        import app as app_module
+        mode = f'deferred-{uuid.uuid4().hex[:8]}'
+        for _ in range(3):
+            response = self.client.post('/api/save-game', json={
+                "gameMode": mode, "moves": "d2d4", "finalFen": chess.STARTING_FEN, "defer": True
+            })
+            self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.post('/api/save-game', json={"defer": True}).status_code, 400)
+        app_module.game_writer.flush(timeout=5)
+        games = json.loads(self.client.get(f'/api/get-games?mode={mode}').data)
+        self.assertEqual(len(games), 3)
+
+    def test_save_requires_moves_mode_and_fen(self):
+        for defer in (False, True):
+            response = self.client.post('/api/save-game', json={
+                "gameMode": self.mode, "finalFen": chess.STARTING_FEN, "defer": defer
+            })
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.data)['error'], 'Missing moves')
+        response = self.client.post('/api/save-game', json={"moves": "e2e4"})
+        self.assertEqual(json.loads(response.data)['error'], 'Missing game_mode, final_fen')
+        games = json.loads(self.client.get(f'/api/get-games?mode={self.mode}').data)
+        self.assertEqual(len(games), 5)
+
+    def test_unpaged_list_is_a_json_array(self):
+        games = json.loads(self.client.get(f'/api/get-games?mode={self.mode}').data)
+        self.assertEqual(sorted(game['id'] for game in games), self.ids)
+        self.assertEqual(games[0]['moves'], "e2e4 e7e5")
+
+    def test_keyset_pages_cover_every_game_once(self):
+        seen, cursor = [], None
+        while True:
+            url = f'/api/get-games?mode={self.mode}&limit=2&fields=id,result'
+            response = self.client.get(url + (f'&cursor={cursor}' if cursor else ''))
+            page = json.loads(response.data)
+            self.assertLessEqual(len(page), 2)
+            self.assertTrue(all(set(game) == {'id', 'result'} for game in page))
+            seen.extend(game['id'] for game in page)
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(self.ids, reverse=True))
+
+    def test_filters_and_bad_arguments(self):
+        games = json.loads(self.client.get(f'/api/get-games?mode={self.mode}&result=1-0&fields=id').data)
+        self.assertEqual(sorted(game['id'] for game in games), self.ids[1::2])
+        games = json.loads(self.client.get(f'/api/get-games?mode={self.mode}&from=2999-01-01').data)
+        self.assertEqual(games, [])
+        self.assertEqual(self.client.get('/api/get-games?fields=password').status_code, 400)
+        self.assertEqual(self.client.get('/api/get-games?limit=0').status_code, 400)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+# test_benchmark.py
+import unittest
+
+import chess
+
+from benchmark import ENDGAME_FENS, compare, load_positions, run
+
+
+class BenchmarkTests(unittest.TestCase):
+
+    def test_compare_gates_node_counts_and_relative_metrics(self):
+        baseline = {'pvs.depth3.time_ms': 100.0, 'pvs.depth3.time_ms.vs_reference': 2.0,
+                    'pvs.nodes_per_sec.vs_reference': 1000.0, 'pvs.depth3.nodes': 500}
+        # Absolute times are not compared; relative ones within tolerance pass
+        self.assertEqual(compare({'pvs.depth3.time_ms': 300.0, 'pvs.depth3.time_ms.vs_reference': 2.4,
+                                  'pvs.nodes_per_sec.vs_reference': 900.0, 'pvs.depth3.nodes': 480},
+                                 baseline), [])
+        regressions = compare({'pvs.depth3.time_ms': 100.0, 'pvs.depth3.time_ms.vs_reference': 3.0,
+                               'pvs.nodes_per_sec.vs_reference': 500.0, 'pvs.depth3.nodes': 501},
+                              baseline)
+        self.assertEqual([name for name, _, _ in regressions],
+                         ['pvs.depth3.nodes', 'pvs.depth3.time_ms.vs_reference', 'pvs.nodes_per_sec.vs_reference'])
+
+    def test_positions_include_pgn_games(self):
+        fens = load_positions(games=2)
+        self.assertGreater(len(fens), len(ENDGAME_FENS))
+        for fen in fens:
+            self.assertTrue(chess.Board(fen).is_valid())
+
+    def test_small_run_reports_every_section(self):
+        results = run(ENDGAME_FENS[:2], search_depth=2, minimax_depth=1, api_depth=1, eval_repeat=2)
+        metrics = results['metrics']
+        for name in ('evaluate_board.calls_per_sec', 'minimax.depth1.nodes', 'alphabeta.depth2.time_ms',
+                     'pvs.nodes_per_sec', 'api.alphabeta.depth1.p50_ms'):
+            self.assertIn(name, metrics)
+        self.assertGreaterEqual(metrics['alphabeta.depth2.nodes'], metrics['alphabeta.depth1.nodes'])
+        # Times and rates of one section share the reference timed before it
+        self.assertAlmostEqual(metrics['pvs.depth2.time_ms'] / metrics['pvs.depth2.time_ms.vs_reference'],
+                               metrics['pvs.nodes_per_sec.vs_reference'] / metrics['pvs.nodes_per_sec'])
+        self.assertNotIn('minimax.depth1.nodes.vs_reference', metrics)
+
+
+if __name__ == "__main__":
+    unittest.main()
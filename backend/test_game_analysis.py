@@ -0,0 +1,107 @@
+# test_game_analysis.py
+import json
+import time
+import unittest
+import uuid
+
+import chess
+
+import app as app_module
+from game_analysis import analyze_game, classify, summarize
+
+# Fool's mate: 2. g4 walks into mate in one
+FOOLS_MATE = "f2f3 e7e5 g2g4 d8h4"
+
+
+class AnalyzeGameTests(unittest.TestCase):
+
+    def test_losses_are_taken_from_the_mover_and_clamped(self):
+        scores = iter([0.2, 0.1, -2.0, 5.0, 25.0])
+        searched_tables = set()
+
+        def search(board, depth, tt):
+            searched_tables.add(id(tt))
+            return next(iter(board.legal_moves)), next(scores)
+
+        moves = [chess.Move.from_uci(uci) for uci in "e2e4 e7e5 g1f3 b8c6".split()]
+        rows = analyze_game(moves, 2, search, tt_size_mb=1)
+        self.assertEqual([row['ply'] for row in rows], [0, 1, 2, 3, 4])
+        self.assertEqual(len(searched_tables), 1)
+        self.assertIsNone(rows[0]['loss'])
+        # White: 0.2 -> 0.1; Black: 0.1 -> -2.0 is a gain; White: -2.0 -> 5.0 gains
+        self.assertEqual([row['loss'] for row in rows[1:4]], [0.1, 0.0, 0.0])
+        # Black: 5.0 -> 25.0 counts as 5.0 -> 10.0
+        self.assertEqual(rows[4]['loss'], 5.0)
+        self.assertEqual(rows[4]['classification'], 'blunder')
+
+    def test_finished_game_ends_with_terminal_score(self):
+        moves = [chess.Move.from_uci(uci) for uci in FOOLS_MATE.split()]
+        rows = analyze_game(moves, 1, lambda board, depth, tt: (next(iter(board.legal_moves)), 0.0), 1)
+        self.assertIsNone(rows[-1]['best_move'])
+        self.assertLess(rows[-1]['score'], -900)
+        self.assertEqual(rows[-1]['loss'], 0.0)
+
+    def test_classify_and_summarize(self):
+        self.assertEqual([classify(loss) for loss in (0.2, 0.5, 1.5, 3.0)],
+                         [None, 'inaccuracy', 'mistake', 'blunder'])
+        rows = [{'ply': 0, 'loss': None, 'classification': None},
+                {'ply': 1, 'loss': 3.5, 'classification': 'blunder'},
+                {'ply': 2, 'loss': 0.5, 'classification': 'inaccuracy'},
+                {'ply': 3, 'loss': 0.5, 'classification': 'inaccuracy'}]
+        summary = summarize(rows)
+        self.assertEqual(summary['white']['moves'], 2)
+        self.assertEqual(summary['white']['average_loss'], 2.0)
+        self.assertEqual(summary['white']['counts']['blunder'], 1)
+        self.assertEqual(summary['black']['counts']['inaccuracy'], 1)
+
+
+class AnalysisAPITests(unittest.TestCase):
+
+    def setUp(self):
+        app_module.app.config["TESTING"] = True
+        self.client = app_module.app.test_client()
+        response = self.client.post('/api/save-game', json={
+            "gameMode": f'analysis-{uuid.uuid4().hex[:8]}', "moves": FOOLS_MATE,
+            "finalFen": "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3", "result": "0-1"
+        })
+        self.game_id = json.loads(response.data)['id']
+
+    def wait_for_analysis(self, url):
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            response = self.client.get(url)
+            if response.status_code != 202:
+                return response
+            time.sleep(0.05)
+        self.fail('analysis did not finish')
+
+    def test_analysis_is_queued_stored_and_reused(self):
+        url = f'/api/games/{self.game_id}/analysis'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(url, json={"depth": 2})
+        self.assertEqual(response.status_code, 202)
+
+        response = self.wait_for_analysis(url)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['depth'], 2)
+        self.assertEqual([move['move'] for move in data['moves'][1:]], FOOLS_MATE.split())
+        self.assertEqual(data['moves'][3]['classification'], 'blunder')
+        self.assertIsNotNone(data['moves'][2]['best_move'])
+        self.assertIsNone(data['moves'][4]['best_move'])
+        self.assertEqual(data['summary']['white']['counts']['blunder'], 1)
+
+        # Already analysed at this depth: nothing is queued
+        response = self.client.post(url, json={"depth": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['depth'], 2)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.post('/api/games/999999999/analysis').status_code, 404)
+        url = f'/api/games/{self.game_id}/analysis'
+        self.assertEqual(self.client.post(url, json={"depth": 0}).status_code, 400)
+        self.assertEqual(self.client.post(url, json={"depth": "3"}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
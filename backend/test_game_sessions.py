@@ -0,0 +1,75 @@
+# test_game_sessions.py
+import json
+import time
+import unittest
+
+import chess
+
+import app as app_module
+from game_sessions import SessionStore
+
+
+class SessionStoreTests(unittest.TestCase):
+
+    def test_least_recently_used_is_evicted_when_full(self):
+        store = SessionStore(max_sessions=2, tt_size_mb=1)
+        first, second = store.create(), store.create()
+        store.get(first.id)
+        store.create()
+        self.assertIsNotNone(store.get(first.id))
+        self.assertIsNone(store.get(second.id))
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(idle_timeout=0.05, tt_size_mb=1)
+        session = store.create()
+        time.sleep(0.1)
+        self.assertIsNone(store.get(session.id))
+        self.assertEqual(len(store), 0)
+
+
+class SessionAPITests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    def create(self, **settings):
+        response = self.client.post('/api/sessions', json=settings)
+        self.assertEqual(response.status_code, 201)
+        return json.loads(response.data)['id']
+
+    def move(self, session_id, **data):
+        return self.client.post(f'/api/sessions/{session_id}/move', json=data)
+
+    def test_move_returns_reply_and_status(self):
+        session_id = self.create(engine="alphabeta", depth=2, use_book=False)
+        data = json.loads(self.move(session_id, move="e2e4").data)
+        board = chess.Board()
+        board.push_uci("e2e4")
+        self.assertEqual(data['played'], "e2e4")
+        self.assertIn(chess.Move.from_uci(data['move']), board.legal_moves)
+        self.assertFalse(data['status']['is_game_over'])
+        state = json.loads(self.client.get(f'/api/sessions/{session_id}').data)
+        self.assertEqual(state['moves'], ["e2e4", data['move']])
+        # SAN works too, and illegal moves are refused without changing the game
+        self.assertEqual(self.move(session_id, move="Ke3").status_code, 400)
+        self.assertEqual(self.move(session_id, move="Nf3", reply=False).status_code, 200)
+
+    def test_threefold_repetition_ends_the_game(self):
+        session_id = self.create()
+        for _ in range(2):
+            for move in ("g1f3", "g8f6", "f3g1", "f6g8"):
+                data = json.loads(self.move(session_id, move=move, reply=False).data)
+        self.assertTrue(data['status']['is_repetition'])
+        self.assertTrue(data['status']['is_game_over'])
+        self.assertEqual(data['status']['result'], "1/2-1/2")
+        self.assertEqual(self.move(session_id, move="e2e4").status_code, 400)
+
+    def test_unknown_and_deleted_sessions(self):
+        session_id = self.create(fen="8/8/8/4k3/8/8/8/R3K3 w - - 0 1")
+        self.assertEqual(self.client.delete(f'/api/sessions/{session_id}').status_code, 200)
+        self.assertEqual(self.move(session_id, move="a1a2").status_code, 404)
+        self.assertEqual(self.client.post('/api/sessions', json={"fen": "bad"}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
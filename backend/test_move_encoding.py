@@ -0,0 +1,105 @@
+# test_move_encoding.py
+import base64
+import json
+import os
+import tempfile
+import unittest
+
+import chess
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app as app_module
+from move_encoding import (decode_move, encode_move, format_stored_moves, migrate, notation,
+                           pack_moves, parse_moves, replay, unpack_moves)
+
+GAME = "e2e4 d7d5 e4d5 g8f6 f1b5 c7c6 d5c6 d8d7 c6b7 e8d8 b7a8q g7g6 g1f3 f8g7 e1g1"
+
+
+class MoveEncodingTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        moves = parse_moves(GAME)
+        data = pack_moves(moves)
+        self.assertEqual(len(data), 2 * len(moves))
+        self.assertEqual(unpack_moves(data), moves)
+        for promotion in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+            move = chess.Move(chess.B7, chess.A8, promotion)
+            self.assertEqual(decode_move(encode_move(move)), move)
+
+    def test_replay_matches_text(self):
+        board = chess.Board()
+        for move in parse_moves(GAME):
+            board.push(move)
+        self.assertEqual(replay(pack_moves(parse_moves(GAME))).fen(), board.fen())
+
+    def test_formats(self):
+        data = pack_moves(parse_moves("e2e4 e7e5 g1f3"))
+        self.assertEqual(format_stored_moves('', data), "e2e4 e7e5 g1f3")
+        self.assertEqual(format_stored_moves('', data, 'san'), "e4 e5 Nf3")
+        self.assertEqual(format_stored_moves('', data, 'san', move_format='uci'), "e2e4 e7e5 g1f3")
+        self.assertEqual(format_stored_moves('', data, move_format='san'), "e4 e5 Nf3")
+        self.assertEqual(base64.b64decode(format_stored_moves('', data, move_format='packed')), data)
+        # Text kept alongside the packed moves is returned as stored
+        self.assertEqual(format_stored_moves("1. e4 e5 2. Nf3", data, 'san'), "1. e4 e5 2. Nf3")
+        self.assertEqual(format_stored_moves("1. e4 e5", None), "1. e4 e5")
+        self.assertEqual(format_stored_moves("1. e4 e5", None, move_format='uci'), "e2e4 e7e5")
+        self.assertEqual(format_stored_moves("not moves", None, move_format='san'), "not moves")
+
+    def test_notation(self):
+        self.assertEqual(notation("e2e4 e7e5 e1g1"), 'uci')
+        self.assertEqual(notation("1. e4 e5 2. Nf3"), 'san')
+        self.assertEqual(notation("e2e4 e5"), 'san')
+
+    def test_migrate_packs_text_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'games.db')}")
+            app_module.Base.metadata.create_all(engine)
+            Session = sessionmaker(bind=engine)
+            session = Session()
+            for moves in (GAME, "garbage", "d4 d5 c4"):
+                session.add(app_module.GameRecord(game_mode='m', moves=moves, final_fen='f'))
+            session.commit()
+            session.close()
+            self.assertEqual(migrate(Session, app_module.GameRecord, batch_size=2), (2, 1))
+            session = Session()
+            rows = session.query(app_module.GameRecord).order_by(app_module.GameRecord.id).all()
+            self.assertEqual(unpack_moves(rows[0].moves_packed), parse_moves(GAME))
+            self.assertEqual((rows[0].moves, rows[0].moves_notation), (GAME, 'uci'))
+            self.assertIsNone(rows[1].moves_packed)
+            self.assertEqual(rows[1].moves, 'garbage')
+            self.assertEqual((rows[2].moves, rows[2].moves_notation), ("d4 d5 c4", 'san'))
+            for row in rows:
+                row.moves_packed = None
+            session.commit()
+            session.close()
+
+            self.assertEqual(migrate(Session, app_module.GameRecord, drop_text=True), (2, 1))
+            session = Session()
+            rows = session.query(app_module.GameRecord).order_by(app_module.GameRecord.id).all()
+            self.assertEqual(rows[2].moves, '')
+            self.assertEqual(format_stored_moves(rows[2].moves, rows[2].moves_packed, rows[2].moves_notation),
+                             "d4 d5 c4")
+            session.close()
+            engine.dispose()
+
+    def test_api_stores_packed_and_returns_requested_format(self):
+        client = app_module.app.test_client()
+        saved = json.loads(client.post('/api/save-game', json={
+            "gameMode": "packed-test", "moves": "e4 e5 Nf3", "finalFen": "f"
+        }).data)
+        session = app_module.Session()
+        record = session.get(app_module.GameRecord, saved['id'])
+        self.assertEqual(len(record.moves_packed), 6)
+        session.close()
+        for move_format, expected in ((None, "e4 e5 Nf3"), ('uci', "e2e4 e7e5 g1f3"), ('san', "e4 e5 Nf3")):
+            url = '/api/get-games?mode=packed-test&limit=1&fields=id,moves'
+            if move_format:
+                url += f'&move_format={move_format}'
+            games = json.loads(client.get(url).data)
+            self.assertEqual(games[0], {'id': saved['id'], 'moves': expected})
+        self.assertEqual(client.get('/api/get-games?move_format=pgn').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# test_opening_book.py
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import chess
+
+import app as app_module
+from move_encoding import parse_moves
+from opening_book import BookBuilder, OpeningBook
+
+PGN = """[Event "a"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Nf6 4. O-O Be7 1-0
+
+[Event "b"]
+[Result "0-1"]
+
+1. d4 d5 2. c4 e6 0-1
+
+[Event "c"]
+[Result "1/2-1/2"]
+
+1. e4 c5 1/2-1/2
+"""
+
+
+class OpeningBookTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'book.bin')
+        builder = BookBuilder(max_ply=8)
+        builder.add_pgn(io.StringIO(PGN))
+        builder.write(self.path)
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self):
+        self.book.close()
+        self.tmp.cleanup()
+
+    def test_weights_follow_results(self):
+        moves = dict(self.book.moves(chess.Board()))
+        # 1. e4: a win and a draw; 1. d4 lost, so it is never chosen
+        self.assertEqual(moves[chess.Move.from_uci("e2e4")], 3)
+        self.assertNotIn(chess.Move.from_uci("d2d4"), moves)
+        self.assertEqual(self.book.choose(chess.Board()), chess.Move.from_uci("e2e4"))
+
+    def test_castling_round_trips(self):
+        board = chess.Board()
+        for uci in ["e2e4", "e7e5", "g1f3", "b8c6", "f1c4", "g8f6"]:
+            board.push_uci(uci)
+        self.assertEqual(self.book.choose(board), chess.Move.from_uci("e1g1"))
+
+    def test_unknown_position(self):
+        board = chess.Board("8/8/8/4k3/8/8/8/4K3 w - - 0 1")
+        self.assertIsNone(self.book.choose(board))
+
+    def test_parse_saved_moves(self):
+        self.assertEqual(parse_moves("e2e4 e7e5"), parse_moves("1. e4 e5"))
+
+    def test_api_plays_book_move(self):
+        previous = app_module.opening_book
+        app_module.opening_book = self.book
+        try:
+            client = app_module.app.test_client()
+            data = json.loads(client.post('/api/move', json={
+                "fen": chess.STARTING_FEN, "engine": "alphabeta", "depth": 2
+            }).data)
+            self.assertEqual(data, {"move": "e2e4", "book": True})
+            data = json.loads(client.post('/api/move', json={
+                "fen": chess.STARTING_FEN, "engine": "alphabeta", "depth": 2, "use_book": False
+            }).data)
+            self.assertNotIn("book", data)
+        finally:
+            app_module.opening_book = previous
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# test_position_index.py
+import json
+import os
+import tempfile
+import unittest
+
+import chess
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app as app_module
+from move_encoding import parse_moves
+from position_index import backfill, position_rows, signed_key
+
+
+class PositionIndexTests(unittest.TestCase):
+
+    def test_rows_cover_every_ply(self):
+        rows = position_rows(7, parse_moves("e4 e5 Nf3"))
+        self.assertEqual([row['ply'] for row in rows], [0, 1, 2, 3])
+        self.assertEqual(rows[0]['zobrist'], signed_key(chess.Board()))
+        for row in rows:
+            self.assertTrue(-2 ** 63 <= row['zobrist'] < 2 ** 63)
+
+    def test_backfill_indexes_unindexed_games(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'games.db')}")
+            app_module.Base.metadata.create_all(engine)
+            Session = sessionmaker(bind=engine)
+            session = Session()
+            for moves in ("e4 e5", "garbage", "d4"):
+                session.add(app_module.GameRecord(game_mode='m', moves=moves, final_fen='f'))
+            session.commit()
+            session.close()
+            self.assertEqual(backfill(Session, app_module.GameRecord, app_module.GamePosition, batch_size=2), (2, 1))
+            self.assertEqual(backfill(Session, app_module.GameRecord, app_module.GamePosition), (0, 1))
+            session = Session()
+            self.assertEqual(session.query(app_module.GamePosition).count(), 5)
+            session.close()
+            engine.dispose()
+
+    def test_lookup_finds_transpositions(self):
+        client = app_module.app.test_client()
+        board = chess.Board()
+        for uci in ("a2a4", "h7h5"):
+            board.push_uci(uci)
+        url = '/api/positions?fen=' + board.fen().replace(' ', '%20')
+        before = json.loads(client.get(url).data)
+        ids = []
+        for moves, result in (("a3 h6 a4 h5", "1-0"), ("a4 h5 Nc3", "1/2-1/2")):
+            response = client.post('/api/save-game', json={
+                "gameMode": "positions-test", "moves": moves, "finalFen": "f", "result": result
+            })
+            ids.append(json.loads(response.data)['id'])
+        after = json.loads(client.get(url).data)
+        self.assertEqual(after['total'], before['total'] + 2)
+        self.assertEqual(after['results'].get('1-0', 0), before['results'].get('1-0', 0) + 1)
+        listed = {game['id']: game['ply'] for game in after['games']}
+        self.assertEqual(listed[ids[0]], 4)
+        self.assertEqual(listed[ids[1]], 2)
+        self.assertEqual(client.get('/api/positions?fen=nonsense').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# test_search_board.py
+import random
+import unittest
+
+import chess
+import chess.polyglot
+
+from evaluation import EvalBoard, evaluate_board, evaluate_terminal
+from search_board import SearchBoard, to_move
+
+# Standard perft positions with their known node counts
+PERFT_POSITIONS = [
+    (chess.STARTING_FEN, [20, 400, 8902]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379]),
+]
+
+
+def python_chess_perft(board, depth):
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += python_chess_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+class SearchBoardTests(unittest.TestCase):
+
+    def test_perft_matches_known_counts(self):
+        for fen, counts in PERFT_POSITIONS:
+            board = SearchBoard.from_board(chess.Board(fen))
+            for depth, expected in enumerate(counts, start=1):
+                self.assertEqual(board.perft(depth), expected, f'{fen} depth {depth}')
+
+    def test_perft_matches_python_chess(self):
+        # En passant out of check, promotions with check and castling rights lost to captures
+        for fen in ["8/8/3p4/1Pp4r/1K3p2/6k1/4P1P1/1R6 w - c6 0 3",
+                    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+                    "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"]:
+            board = chess.Board(fen)
+            self.assertEqual(SearchBoard.from_board(board).perft(3), python_chess_perft(board, 3), fen)
+
+    def test_random_games_agree_with_python_chess(self):
+        rng = random.Random(7)
+        for fen, _ in PERFT_POSITIONS:
+            for _ in range(5):
+                board = EvalBoard(fen)
+                search_board = SearchBoard.from_board(board)
+                for _ in range(80):
+                    codes = search_board.legal_moves()
+                    # Same moves in the same order, same key and same score
+                    self.assertEqual([to_move(code) for code in codes], list(board.legal_moves))
+                    self.assertEqual(search_board.zobrist(), chess.polyglot.zobrist_hash(board))
+                    self.assertAlmostEqual(search_board.evaluate(), evaluate_board(board))
+                    self.assertEqual(search_board.to_board().fen(), board.fen())
+                    if not codes:
+                        break
+                    code = rng.choice(codes)
+                    search_board.make(code)
+                    board.push(to_move(code))
+
+    def test_evaluate_child_matches_evaluate(self):
+        fens = [fen for fen, _ in PERFT_POSITIONS] + ["8/8/3p4/1Pp4r/1K3p2/6k1/4P1P1/1R6 w - c6 0 3",
+                                                       "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1"]
+        for fen in fens:
+            board = SearchBoard.from_board(chess.Board(fen))
+            for first in [None] + board.legal_moves():
+                if first is not None:
+                    board.make(first)
+                total, terms = board.mobility_terms()
+                occ = list(board.occ)
+                for code in board.legal_moves():
+                    board.make(code)
+                    self.assertEqual(board.evaluate_child(total, terms, occ), board.evaluate(), (fen, first, code))
+                    board.unmake()
+                if first is not None:
+                    board.unmake()
+
+    def test_unmake_restores_position(self):
+        board = SearchBoard.from_board(chess.Board(PERFT_POSITIONS[1][0]))
+        before = (list(board.bb), list(board.mailbox), board.key, board.score, board.castling, board.ep)
+        for code in board.legal_moves():
+            board.make(code)
+            board.unmake()
+        self.assertEqual((list(board.bb), list(board.mailbox), board.key, board.score, board.castling, board.ep),
+                         before)
+
+    def test_terminal_positions(self):
+        board = chess.Board("R5k1/5ppp/8/8/8/8/5PPP/6K1 b - - 1 1")
+        mated = SearchBoard.from_board(board)
+        self.assertFalse(mated.has_legal_move())
+        self.assertEqual(mated.terminal_score(), evaluate_terminal(board))
+        stalemate = SearchBoard.from_board(chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"))
+        self.assertFalse(stalemate.has_legal_move())
+        self.assertEqual(stalemate.terminal_score(), 0.0)
+        self.assertTrue(SearchBoard.from_board(chess.Board("8/8/4k3/8/8/3BK3/8/8 w - - 0 1")).is_draw())
+
+    def test_fivefold_repetition_counts_earlier_moves(self):
+        board = chess.Board()
+        for _ in range(4):
+            for uci in ("g1f3", "g8f6", "f3g1", "f6g8"):
+                board.push_uci(uci)
+        self.assertTrue(board.is_fivefold_repetition())
+        self.assertTrue(SearchBoard.from_board(board).is_draw())
+
+
+if __name__ == '__main__':
+    unittest.main()
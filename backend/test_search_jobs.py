@@ -0,0 +1,203 @@
+# test_search_jobs.py
+import json
+import threading
+import time
+import unittest
+
+import chess
+
+import app as app_module
+from ponder import ActivityCounter, ThrottledContext
+from search_jobs import CANCELLED, DONE, FAILED, JobManager, JobQueueFull
+
+
+def wait_for(manager, job, timeout=30):
+    deadline = time.time() + timeout
+    while job.status not in (DONE, CANCELLED, FAILED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+class JobManagerTests(unittest.TestCase):
+
+    def test_completed_job_keeps_result(self):
+        manager = JobManager(lambda job: {'move': 'e2e4'})
+        job = manager.submit({})
+        self.assertEqual(wait_for(manager, job), DONE)
+        self.assertEqual(manager.get(job.id).to_dict()['move'], 'e2e4')
+
+    def test_runner_errors_fail_the_job(self):
+        def runner(job):
+            raise ValueError('bad fen')
+        manager = JobManager(runner)
+        job = manager.submit({})
+        self.assertEqual(wait_for(manager, job), FAILED)
+        self.assertEqual(job.error, 'bad fen')
+
+    def test_full_queue_is_rejected(self):
+        manager = JobManager(lambda job: job.cancel_event.wait(5), max_workers=1, max_jobs=2)
+        jobs = [manager.submit({}), manager.submit({})]
+        with self.assertRaises(JobQueueFull):
+            manager.submit({})
+        for job in jobs:
+            manager.cancel(job.id)
+            self.assertEqual(wait_for(manager, job), CANCELLED)
+        # Finished jobs make room for new ones
+        manager.cancel(manager.submit({}).id)
+
+
+class SearchJobAPITests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+
+    def poll(self, job_id, timeout=30):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            data = json.loads(self.client.get(f'/api/search/{job_id}').data)
+            if data['status'] in (DONE, CANCELLED, FAILED):
+                return data
+            time.sleep(0.02)
+        self.fail('search job did not finish')
+
+    def test_submit_and_poll(self):
+        response = self.client.post('/api/search', json={
+            "fen": chess.STARTING_FEN, "engine": "pvs", "depth": 3
+        })
+        self.assertEqual(response.status_code, 202)
+        data = self.poll(json.loads(response.data)['id'])
+        self.assertEqual(data['status'], DONE)
+        self.assertEqual(data['result']['depth'], 3)
+        self.assertEqual(data['partial']['depth'], 3)
+        self.assertIn(chess.Move.from_uci(data['move']), chess.Board().legal_moves)
+
+    def test_cancel_stops_search(self):
+        response = self.client.post('/api/search', json={
+            "fen": chess.STARTING_FEN, "engine": "alphabeta", "depth": 20
+        })
+        job_id = json.loads(response.data)['id']
+        time.sleep(0.2)
+        start = time.time()
+        self.client.delete(f'/api/search/{job_id}')
+        data = self.poll(job_id, timeout=5)
+        self.assertEqual(data['status'], CANCELLED)
+        self.assertLess(time.time() - start, 2)
+
+    def read_events(self, response):
+        events = []
+        for block in response.get_data(as_text=True).split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+            if lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+        return events
+
+    def test_stream_reports_each_iteration(self):
+        response = self.client.post('/api/search/stream', json={
+            "fen": chess.STARTING_FEN, "engine": "pvs", "depth": 3
+        })
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = self.read_events(response)
+        self.assertEqual([name for name, _ in events], ['start', 'iteration', 'iteration', 'iteration', 'bestmove'])
+        iterations = [data for name, data in events if name == 'iteration']
+        self.assertEqual([data['depth'] for data in iterations], [1, 2, 3])
+        last = iterations[-1]
+        self.assertEqual(last['pv'][0], last['move'])
+        self.assertGreater(last['nodes'], 0)
+        self.assertEqual(events[-1][1]['status'], DONE)
+        self.assertEqual(events[-1][1]['move'], last['move'])
+
+    def test_stream_accepts_query_arguments(self):
+        response = self.client.get('/api/search/stream?fen=' + chess.STARTING_FEN.replace(' ', '%20')
+                                   + '&engine=alphabeta&depth=2')
+        events = self.read_events(response)
+        self.assertEqual(events[-1][0], 'bestmove')
+        self.assertEqual(events[-2][1]['depth'], 2)
+
+    def test_stream_rejects_non_numeric_query_arguments(self):
+        response = self.client.get('/api/search/stream?fen=' + chess.STARTING_FEN.replace(' ', '%20')
+                                   + '&engine=alphabeta&depth=deep')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.data)['error'], 'depth must be an integer')
+
+    def test_closing_stream_cancels_search(self):
+        response = self.client.post('/api/search/stream', json={
+            "fen": chess.STARTING_FEN, "engine": "alphabeta", "depth": 20
+        }, buffered=False)
+        stream = iter(response.response)
+        job_id = json.loads(next(stream).decode().split('data: ', 1)[1])['id']
+        response.close()
+        data = self.poll(job_id, timeout=5)
+        self.assertEqual(data['status'], CANCELLED)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/search/nope').status_code, 404)
+        self.assertEqual(self.client.delete('/api/search/nope').status_code, 404)
+
+
+class PonderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+
+    def reply(self, game_id, fen):
+        return json.loads(self.client.post('/api/move', json={
+            "fen": fen, "engine": "alphabeta", "depth": 3, "game_id": game_id,
+            "ponder": True, "use_book": False
+        }).data)
+
+    def test_ponder_hit_answers_from_background_search(self):
+        app_module.result_cache.clear()
+        first = self.reply('ponder-hit', self.fen)
+        self.assertIn('ponder', first)
+        job = app_module.ponderer.get('ponder-hit')
+        self.assertEqual(wait_for(None, job), DONE)
+        board = chess.Board(self.fen)
+        board.push_uci(first['move'])
+        board.push_uci(first['ponder'])
+        second = self.reply('ponder-hit', board.fen())
+        self.assertTrue(second.get('ponderhit'))
+        self.assertIn(chess.Move.from_uci(second['move']), board.legal_moves)
+
+    def test_ponder_miss_cancels_and_searches(self):
+        app_module.result_cache.clear()
+        first = self.reply('ponder-miss', self.fen)
+        job = app_module.ponderer.get('ponder-miss')
+        board = chess.Board(self.fen)
+        board.push_uci(first['move'])
+        other = next(move for move in board.legal_moves if move.uci() != first['ponder'])
+        board.push(other)
+        second = self.reply('ponder-miss', board.fen())
+        self.assertNotIn('ponderhit', second)
+        self.assertIn(chess.Move.from_uci(second['move']), board.legal_moves)
+        self.assertTrue(job.cancel_event.is_set())
+        app_module.ponderer.stop('ponder-miss')
+
+    def test_throttled_search_pauses(self):
+        board = chess.Board()
+        start = time.monotonic()
+        ctx = ThrottledContext(duty_cycle=0.25)
+        app_module.alpha_beta(board, 4, -float('inf'), float('inf'), True, ctx=ctx)
+        throttled = time.monotonic() - start
+        start = time.monotonic()
+        app_module.alpha_beta(board, 4, -float('inf'), float('inf'), True, ctx=ThrottledContext())
+        self.assertGreater(throttled, 2 * (time.monotonic() - start))
+
+    def test_throttled_search_yields_to_foreground(self):
+        foreground = ActivityCounter()
+        ctx = ThrottledContext(yield_to=foreground.active)
+        board = chess.Board()
+        search = threading.Thread(target=app_module.alpha_beta,
+                                  args=(board, 3, -float('inf'), float('inf'), True), kwargs={'ctx': ctx})
+        with foreground:
+            search.start()
+            time.sleep(0.2)
+            # Stopped at the first check and stays there while the foreground runs
+            self.assertEqual(ctx.nodes, ThrottledContext.YIELD_CHECK_EVERY)
+        search.join(timeout=30)
+        self.assertFalse(search.is_alive())
+        self.assertGreater(ctx.nodes, ThrottledContext.YIELD_CHECK_EVERY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# test_tablebase.py
+import json
+import math
+import tempfile
+import unittest
+
+import chess
+
+import app as app_module
+import search
+from search_context import SearchContext
+from tablebase import DRAW, LOSS, WIN, generate
+
+
+class TablebaseTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.tablebases = generate({'KQK', 'KRK'}, cls.tmp.name, verbose=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_mate_in_one(self):
+        board = chess.Board("6k1/8/6K1/8/8/8/8/R7 w - - 0 1")
+        self.assertEqual(self.tablebases.probe(board), (WIN, 1))
+        self.assertEqual(self.tablebases.best_move(board), chess.Move.from_uci("a1a8"))
+
+    def test_checkmated_side_to_move(self):
+        board = chess.Board("R5k1/8/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertEqual(self.tablebases.probe(board), (LOSS, 0))
+
+    def test_longest_krk_mate(self):
+        values = self.tablebases.tables['KRK']
+        self.assertEqual(max(values[0::2]) - 1, 31)  # 16 moves
+
+    def test_colors_are_mirrored(self):
+        white = chess.Board("8/8/8/4k3/8/8/3Q4/4K3 w - - 0 1")
+        black = chess.Board("4k3/3q4/8/8/4K3/8/8/8 b - - 0 1")
+        self.assertEqual(self.tablebases.probe(white), self.tablebases.probe(black))
+
+    def test_draws(self):
+        # Queen hangs to the lone king
+        board = chess.Board("8/8/8/8/3Q4/4k3/8/7K b - - 0 1")
+        self.assertEqual(self.tablebases.probe(board), (DRAW, 0))
+        self.assertEqual(self.tablebases.probe(chess.Board("8/8/4k3/8/8/2K5/8/8 w - - 0 1")), (DRAW, 0))
+        self.assertIsNone(self.tablebases.probe(chess.Board()))
+
+    def test_perfect_play_mates_on_time(self):
+        board = chess.Board("8/8/3k4/8/8/8/8/R3K3 w - - 0 1")
+        _, dtm = self.tablebases.probe(board)
+        for _ in range(dtm):
+            board.push(self.tablebases.best_move(board))
+        self.assertTrue(board.is_checkmate())
+
+    def test_search_and_api_use_tablebases(self):
+        previous = app_module.tablebases
+        app_module.tablebases = search.tablebases = self.tablebases
+        try:
+            board = chess.Board("8/8/8/3k4/8/8/8/R3K3 w - - 0 1")
+            ctx = SearchContext()
+            _, score = app_module.alpha_beta(board, 2, -math.inf, math.inf, True, ctx=ctx)
+            self.assertGreater(score, 900)
+            client = app_module.app.test_client()
+            data = json.loads(client.post('/api/move', json={
+                "fen": board.fen(), "engine": "alphabeta", "depth": 2
+            }).data)
+            self.assertTrue(data['tablebase'])
+            self.assertEqual(data['move'], self.tablebases.best_move(board).uci())
+        finally:
+            app_module.tablebases = search.tablebases = previous
+
+
+if __name__ == "__main__":
+    unittest.main()
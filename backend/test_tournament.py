@@ -0,0 +1,40 @@
+# test_tournament.py
+import unittest
+
+from tournament import OPENINGS, elo, elo_estimate, run_tournament, schedule, sprt_bounds, sprt_llr
+
+
+class TournamentTests(unittest.TestCase):
+
+    def test_elo_from_score(self):
+        self.assertAlmostEqual(elo(0.5), 0.0)
+        self.assertAlmostEqual(elo(0.75), 190.85, places=1)
+        difference, margin = elo_estimate([1.0, 0.5, 0.5, 0.0])
+        self.assertAlmostEqual(difference, 0.0)
+        self.assertGreater(margin, 0)
+
+    def test_sprt_direction(self):
+        lower, upper = sprt_bounds()
+        self.assertLess(lower, 0)
+        self.assertGreater(upper, 0)
+        self.assertGreater(sprt_llr([1.0] * 30 + [0.5] * 10, 0, 50), upper)
+        self.assertLess(sprt_llr([0.0] * 30 + [0.5] * 10, 0, 50), lower)
+
+    def test_colours_alternate(self):
+        games = schedule('pvs:2', 'alphabeta:2', OPENINGS[:2], rounds=1)
+        self.assertEqual(games[0], ('pvs:2', 'alphabeta:2', OPENINGS[0], True))
+        self.assertEqual(games[1], ('alphabeta:2', 'pvs:2', OPENINGS[0], False))
+        self.assertEqual(len(games), 4)
+
+    def test_small_tournament(self):
+        summary, games = run_tournament('pvs:1', 'minimax:1', OPENINGS[:2], workers=2, max_plies=30)
+        self.assertEqual(summary['games'], 4)
+        self.assertEqual(summary['wins'] + summary['draws'] + summary['losses'], 4)
+        self.assertEqual(sorted(game['white'] for game in games), ['minimax:1', 'minimax:1', 'pvs:1', 'pvs:1'])
+        for game in games:
+            self.assertLessEqual(len(game['moves']), 30)
+            self.assertIn(game['result'], ('1-0', '0-1', '1/2-1/2'))
+
+
+if __name__ == "__main__":
+    unittest.main()
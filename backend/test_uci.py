@@ -0,0 +1,122 @@
+# test_uci.py
+import time
+import unittest
+from unittest import mock
+
+import chess
+
+from evaluation import MATE_SCORE
+from uci import UCIEngine, format_score, time_budget_ms
+
+
+class UCITests(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = []
+        self.engine = UCIEngine(output=self.lines.append)
+
+    def send(self, *commands):
+        for command in commands:
+            self.engine.handle(command)
+
+    def wait_for_search(self):
+        self.engine.search_thread.join(timeout=60)
+        self.assertFalse(self.engine.search_thread.is_alive())
+
+    def bestmove(self):
+        return next(line for line in self.lines if line.startswith('bestmove')).split()[1]
+
+    def test_handshake(self):
+        self.send('uci', 'isready')
+        self.assertIn('option name Hash type spin default 16 min 1 max 1024', self.lines)
+        self.assertEqual(self.lines[-2:], ['uciok', 'readyok'])
+
+    def test_go_depth_reports_info_and_legal_bestmove(self):
+        self.send('position startpos moves e2e4', 'go depth 2')
+        self.wait_for_search()
+        infos = [line for line in self.lines if line.startswith('info depth')]
+        self.assertEqual(len(infos), 2)
+        self.assertIn(' nodes ', infos[-1])
+        self.assertIn(' nps ', infos[-1])
+        board = chess.Board()
+        board.push_uci('e2e4')
+        self.assertIn(chess.Move.from_uci(self.bestmove()), board.legal_moves)
+
+    def test_go_infinite_waits_for_stop(self):
+        self.send('position startpos', 'go infinite')
+        time.sleep(0.2)
+        self.assertFalse(any(line.startswith('bestmove') for line in self.lines))
+        self.send('stop')
+        self.assertIn(chess.Move.from_uci(self.bestmove()), chess.Board().legal_moves)
+
+    def test_commands_during_infinite_search(self):
+        self.send('uci', 'position startpos', 'go infinite', 'isready')
+        self.assertEqual(self.lines[-1], 'readyok')
+        self.send('position startpos moves e2e4', 'setoption name Hash value 1')
+        self.assertEqual(self.lines[-2:], ['info string position ignored while searching',
+                                           'info string setoption ignored while searching'])
+        self.send('stop')
+        self.assertIn(chess.Move.from_uci(self.bestmove()), chess.Board().legal_moves)
+        self.assertEqual(self.engine.hash_mb, 16)
+        self.send('position startpos moves e2e4')
+        self.assertEqual(len(self.engine.board.move_stack), 1)
+
+    def test_aborted_minimax_plays_a_root_move(self):
+        self.send('setoption name Engine value minimax', 'position startpos moves e2e4', 'go nodes 50 depth 3')
+        self.wait_for_search()
+        board = chess.Board()
+        board.push_uci('e2e4')
+        self.assertIn(chess.Move.from_uci(self.bestmove()), board.legal_moves)
+
+    def test_stop_interrupts_parallel_search(self):
+        with mock.patch('uci.SEARCH_WORKERS', 2):
+            self.send('setoption name Threads value 2')
+        self.assertEqual(self.engine.threads, 2)
+        self.send('position startpos', 'go infinite', 'isready')
+        self.assertEqual(self.lines[-1], 'readyok')
+        time.sleep(2)
+        start = time.monotonic()
+        self.send('stop')
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertIn(chess.Move.from_uci(self.bestmove()), chess.Board().legal_moves)
+
+    def test_go_nodes_stops_search(self):
+        self.send('position startpos', 'go nodes 500')
+        self.wait_for_search()
+        self.assertTrue(self.bestmove())
+
+    def test_mate_score(self):
+        self.send('position fen 6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1', 'go depth 3')
+        self.wait_for_search()
+        self.assertEqual(self.bestmove(), 'a1a8')
+        self.assertTrue(any(' score mate 1 ' in line for line in self.lines))
+
+    def test_position_updates_incrementally(self):
+        self.send('position startpos moves e2e4')
+        board = self.engine.board
+        self.send('position startpos moves e2e4 e7e5')
+        self.assertIs(self.engine.board, board)
+        self.assertEqual(board.move_stack[-1].uci(), 'e7e5')
+        self.send('position startpos moves d2d4')
+        self.assertIsNot(self.engine.board, board)
+        self.assertEqual([move.uci() for move in self.engine.board.move_stack], ['d2d4'])
+
+    def test_setoption(self):
+        self.assertEqual(self.engine.engine, 'alphabeta')
+        self.send('setoption name Hash value 4', 'setoption name Threads value 1',
+                  'setoption name Engine value pvs')
+        self.assertEqual(self.engine.hash_mb, 4)
+        self.assertEqual(self.engine.engine, 'pvs')
+
+    def test_format_score_and_time_budget(self):
+        board = chess.Board()
+        self.assertEqual(format_score(1.5, board), 'cp 150')
+        self.assertEqual(format_score(MATE_SCORE - 3, board), 'mate 2')
+        board.push_uci('e2e4')
+        self.assertEqual(format_score(1.5, board), 'cp -150')
+        self.assertIsNone(time_budget_ms(board, {'depth': 3}))
+        self.assertEqual(time_budget_ms(board, {'btime': 30000, 'binc': 0}), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
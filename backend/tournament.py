@@ -0,0 +1,289 @@
+# tournament.py
+"""Self-play tournaments between engine settings, run in-process.
+
+    python tournament.py pvs:3 alphabeta:3 --rounds 2 --workers 4
+    python tournament.py pvs:3 alphabeta:3 --sprt 0 20 --rounds 50
+
+Each opening is played twice per round with colours swapped. Results are
+reported from the first engine's point of view.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import chess
+import chess.pgn
+
+from evaluation import EvalBoard
+from move_encoding import encode_for_storage, parse_moves
+from transposition import TranspositionTable
+
+# Short, balanced opening lines (SAN from the initial position)
+OPENINGS = [
+    "e4 e5 Nf3 Nc6 Bb5",
+    "e4 e5 Nf3 Nc6 Bc4 Bc5",
+    "e4 c5 Nf3 d6 d4 cxd4 Nxd4",
+    "e4 e6 d4 d5 Nc3",
+    "e4 c6 d4 d5 e5",
+    "d4 d5 c4 e6 Nc3 Nf6",
+    "d4 d5 c4 c6 Nf3 Nf6",
+    "d4 Nf6 c4 g6 Nc3 Bg7",
+    "d4 Nf6 c4 e6 Nc3 Bb4",
+    "c4 e5 Nc3 Nf6 g3",
+    "Nf3 d5 g3 Nf6 Bg2",
+    "e4 d5 exd5 Qxd5 Nc3 Qa5",
+]
+
+DEFAULT_MAX_PLIES = 200
+
+
+class EngineSpec:
+    """An engine and its search settings, written as engine:depth"""
+
+    def __init__(self, text):
+        engine, _, depth = text.partition(':')
+        if engine not in ('minimax', 'alphabeta', 'pvs'):
+            raise ValueError(f'Unknown engine {engine}')
+        self.engine = engine
+        self.depth = int(depth) if depth else 3
+        self.name = f'{self.engine}:{self.depth}'
+
+    def request(self):
+        return {'engine': self.engine, 'depth': self.depth, 'use_book': False}
+
+
+def pgn_openings(path, plies=8, limit=50):
+    """Opening lines from the first moves of games in a PGN file"""
+    lines = []
+    with open(path) as handle:
+        while len(lines) < limit:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                break
+            moves = list(game.mainline_moves())[:plies]
+            if len(moves) == plies:
+                lines.append(' '.join(move.uci() for move in moves))
+    return lines
+
+
+def play_game(white, black, opening, max_plies=DEFAULT_MAX_PLIES):
+    """Play one game between two engine spec strings from an opening line.
+
+    Returns a dict with the result, termination, UCI moves and final FEN.
+    """
+    # app connects to the database on import, so it is only loaded once a game is played
+    from app import search_move
+    specs = {chess.WHITE: EngineSpec(white), chess.BLACK: EngineSpec(black)}
+    tables = {color: TranspositionTable() for color in specs}
+    board = EvalBoard()
+    for move in parse_moves(opening):
+        board.push(move)
+    start = time.monotonic()
+
+    termination = None
+    while termination is None:
+        if board.is_game_over():
+            termination = board.outcome().termination.name.lower()
+        elif board.is_repetition(3):
+            termination = 'threefold_repetition'
+        elif board.is_fifty_moves():
+            termination = 'fifty_moves'
+        elif len(board.move_stack) >= max_plies:
+            termination = 'max_plies'
+        else:
+            result = search_move(specs[board.turn].request(), board, tt=tables[board.turn])
+            board.push(chess.Move.from_uci(result['move']))
+
+    outcome = board.outcome()
+    return {
+        'white': white,
+        'black': black,
+        'opening': opening,
+        'result': outcome.result() if outcome is not None and outcome.winner is not None else '1/2-1/2',
+        'termination': termination,
+        'moves': [move.uci() for move in board.move_stack],
+        'final_fen': board.fen(),
+        'seconds': time.monotonic() - start,
+    }
+
+
+def score_for(game, as_white):
+    """1, 0.5 or 0 for the side given by as_white"""
+    if game['result'] == '1/2-1/2':
+        return 0.5
+    return 1.0 if (game['result'] == '1-0') == as_white else 0.0
+
+
+def elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(scores):
+    """(Elo difference, 95% error margin) from per-game scores"""
+    n = len(scores)
+    mean = sum(scores) / n
+    variance = sum((score - mean) ** 2 for score in scores) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    return elo(mean), (elo(min(1.0, mean + margin)) - elo(max(0.0, mean - margin))) / 2
+
+
+def expected_score(elo_difference):
+    return 1 / (1 + 10 ** (-elo_difference / 400))
+
+
+def sprt_llr(scores, elo0, elo1):
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0), using the
+    normal approximation to the game score distribution"""
+    n = len(scores)
+    mean = sum(scores) / n
+    variance = sum((score - mean) ** 2 for score in scores) / n
+    if variance == 0:
+        return 0.0
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+
+def sprt_bounds(alpha=0.05, beta=0.05):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def schedule(first, second, openings, rounds):
+    """(white, black, opening, first engine is white) for every game,
+    colours alternating"""
+    games = []
+    for _ in range(rounds):
+        for opening in openings:
+            games.append((first, second, opening, True))
+            games.append((second, first, opening, False))
+    return games
+
+
+def run_tournament(first, second, openings=OPENINGS, rounds=1, workers=None,
+                   max_plies=DEFAULT_MAX_PLIES, sprt=None, on_game=None):
+    """Play the schedule on a process pool and return the summary.
+
+    With sprt=(elo0, elo1) the tournament stops as soon as the test accepts
+    either hypothesis; games not yet started are cancelled.
+    """
+    first, second = EngineSpec(first).name, EngineSpec(second).name
+    workers = workers or os.cpu_count() or 1
+    # Fresh worker processes: the caller may have imported app, whose
+    # background threads make forking unsafe
+    mp_context = multiprocessing.get_context('spawn')
+    games, scores = [], []
+    start = time.monotonic()
+    verdict = None
+    lower, upper = sprt_bounds()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        first_is_white = {pool.submit(play_game, white, black, opening, max_plies): as_white
+                          for white, black, opening, as_white in schedule(first, second, openings, rounds)}
+        pending = set(first_is_white)
+        while pending and verdict is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                game = future.result()
+                games.append(game)
+                scores.append(score_for(game, first_is_white[future]))
+                if on_game is not None:
+                    on_game(game)
+            if sprt is not None and len(scores) >= 2:
+                llr = sprt_llr(scores, *sprt)
+                if llr <= lower:
+                    verdict = 'H0'
+                elif llr >= upper:
+                    verdict = 'H1'
+        for future in pending:
+            future.cancel()
+    elapsed = time.monotonic() - start
+
+    wins = scores.count(1.0)
+    draws = scores.count(0.5)
+    losses = scores.count(0.0)
+    elo_difference, margin = elo_estimate(scores) if scores else (0.0, 0.0)
+    summary = {
+        'engines': [first, second],
+        'games': len(games),
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': sum(scores) / len(scores) if scores else None,
+        'elo': elo_difference,
+        'elo_margin': margin,
+        'games_per_minute': len(games) / elapsed * 60 if elapsed > 0 else None,
+        'seconds': elapsed,
+    }
+    if sprt is not None:
+        summary['sprt'] = {'elo0': sprt[0], 'elo1': sprt[1], 'llr': sprt_llr(scores, *sprt) if scores else 0.0,
+                           'bounds': [lower, upper], 'verdict': verdict}
+    return summary, games
+
+
+def save_games(games):
+    """Bulk-save finished games to the games table (with their positions)"""
+    from app import write_games
+    rows = []
+    for game in games:
+        moves, moves_packed, moves_notation = encode_for_storage(' '.join(game['moves']))
+        rows.append({
+            'date_played': datetime.utcnow(),
+            'game_mode': f"tournament {game['white']} vs {game['black']}"[:50],
+            'moves': moves,
+            'moves_packed': moves_packed,
+            'moves_notation': moves_notation,
+            'final_fen': game['final_fen'],
+            'result': game['result'],
+            'engine_depth': EngineSpec(game['white']).depth,
+            'duration_seconds': round(game['seconds']),
+        })
+    write_games(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a self-play tournament between two engine settings')
+    parser.add_argument('first', help='engine:depth, e.g. pvs:3')
+    parser.add_argument('second', help='engine:depth, e.g. alphabeta:3')
+    parser.add_argument('--rounds', type=int, default=1, help='times through the opening set (2 games each)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES, help='adjudicate a draw after this many plies')
+    parser.add_argument('--pgn', help='take openings from the first moves of games in this PGN')
+    parser.add_argument('--opening-plies', type=int, default=8)
+    parser.add_argument('--sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'), help='stop early on an SPRT decision')
+    parser.add_argument('--save', action='store_true', help='save the games to the database')
+    parser.add_argument('--output', help='write the summary and games as JSON')
+    args = parser.parse_args()
+    if not args.save:
+        # Nothing is written, so don't require the games database
+        os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+    openings = pgn_openings(args.pgn, args.opening_plies) if args.pgn else OPENINGS
+
+    def progress(game):
+        print(f"{game['white']:>14} - {game['black']:<14} {game['result']:>7}  {game['termination']}")
+
+    summary, games = run_tournament(args.first, args.second, openings, args.rounds, args.workers,
+                                    args.max_plies, args.sprt, on_game=progress)
+    print(f"\n{summary['engines'][0]} vs {summary['engines'][1]}: "
+          f"+{summary['wins']} ={summary['draws']} -{summary['losses']} in {summary['games']} games")
+    print(f"Elo {summary['elo']:+.1f} +/- {summary['elo_margin']:.1f} (95%), "
+          f"{summary['games_per_minute']:.1f} games/min")
+    if 'sprt' in summary:
+        sprt = summary['sprt']
+        print(f"SPRT [{sprt['elo0']}, {sprt['elo1']}]: LLR {sprt['llr']:.2f} "
+              f"({sprt['bounds'][0]:.2f}, {sprt['bounds'][1]:.2f}) -> {sprt['verdict'] or 'inconclusive'}")
+    if args.save:
+        save_games(games)
+        print(f'Saved {len(games)} games')
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'summary': summary, 'games': games}, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# transposition.py
+
+from array import array
+from collections import namedtuple
+
+# Bound types for stored scores
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Bytes per entry: 8 for the key, 8 for the score and 4 for the packed
+# move/depth/flag/age word, each in its own preallocated array
+ENTRY_BYTES = 20
+
+# Layout of the packed word: move code (bits 0-14, move_encoding.encode_move),
+# depth (15-20), flag (21-22), age (23-30) and an occupied bit (31)
+MOVE_MASK = 0x7FFF
+DEPTH_SHIFT = 15
+MAX_DEPTH = 63
+FLAG_SHIFT = 21
+AGE_SHIFT = 23
+OCCUPIED = 1 << 31
+
+TTEntry = namedtuple('TTEntry', ['key', 'depth', 'score', 'flag', 'move', 'age'])
+
+
+class TranspositionTable:
+    """Fixed-size transposition table keyed on a Zobrist hash.
+
+    Entries live in preallocated arrays of power-of-two length, indexed by
+    the low bits of the key, so memory never grows past the cap. Moves are
+    stored as 15-bit codes (encode_move); probe hands them back as ints,
+    or None when no move was stored. A slot is overwritten when it is
+    empty, left over from an older search, or holds a shallower (or
+    equally deep) result than the new one.
+    """
+
+    def __init__(self, size_mb=16):
+        entries = max(1, (size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.size = 1 << (entries.bit_length() - 1)
+        self.mask = self.size - 1
+        self._allocate()
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def _allocate(self):
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('d', [0.0]) * self.size
+        self.data = array('I', [0]) * self.size
+
+    def new_search(self):
+        """Start a new search; entries from earlier searches become replaceable"""
+        self.age = (self.age + 1) & 0xFF
+
+    def probe(self, key):
+        """Return the entry stored for key, or None"""
+        self.probes += 1
+        index = key & self.mask
+        data = self.data[index]
+        if data and self.keys[index] == key:
+            self.hits += 1
+            move = data & MOVE_MASK
+            return TTEntry(key, data >> DEPTH_SHIFT & MAX_DEPTH, self.scores[index], data >> FLAG_SHIFT & 3,
+                           move or None, data >> AGE_SHIFT & 0xFF)
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """Store a search result, honouring the depth-preferred/aging policy.
+
+        move is a move code or None; bits above the 15-bit code are dropped.
+        """
+        index = key & self.mask
+        current = self.data[index]
+        depth = min(depth, MAX_DEPTH)
+        if (not current or (current >> AGE_SHIFT & 0xFF) != self.age
+                or depth >= (current >> DEPTH_SHIFT & MAX_DEPTH)):
+            self.keys[index] = key
+            self.scores[index] = score
+            self.data[index] = (OCCUPIED | self.age << AGE_SHIFT | flag << FLAG_SHIFT
+                                | depth << DEPTH_SHIFT | (move or 0) & MOVE_MASK)
+
+    def clear(self):
+        self._allocate()
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return self.size - self.data.count(0)
@@ -0,0 +1,239 @@
+# uci.py
+"""UCI front end for the engines: python uci.py
+
+Supports uci, isready, ucinewgame, setoption (Hash, Threads, Engine),
+position [startpos | fen ...] [moves ...], go (depth, movetime, nodes,
+wtime/btime/winc/binc/movestogo, infinite), stop and quit. isready is
+answered straight away; commands that would change the position or the
+hash table while a search runs are refused with an info string.
+"""
+
+import os
+import sys
+import threading
+
+import chess
+
+# The UCI process never touches the games database
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import SEARCH_WORKERS, parallel_search
+from evaluation import MATE_SCORE, EvalBoard
+from search import MAX_SEARCH_DEPTH, iterative_deepening, minimax, principal_variation
+from search_context import SearchContext, SearchAborted
+from transposition import TranspositionTable
+
+ENGINE_NAME = 'Chess Website Engine'
+ENGINES = ('alphabeta', 'pvs', 'minimax')
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+# Scores this close to MATE_SCORE are reported as mates
+MATE_THRESHOLD = MATE_SCORE - 500
+
+
+def format_score(white_score, board):
+    """UCI score string from the side to move's point of view"""
+    score = white_score if board.turn == chess.WHITE else -white_score
+    if abs(score) >= MATE_THRESHOLD:
+        plies = round(MATE_SCORE - abs(score)) - board.ply()
+        moves = (plies + 1) // 2
+        return f'mate {moves if score > 0 else -moves}'
+    return f'cp {round(score * 100)}'
+
+
+def time_budget_ms(board, params):
+    """Time for this move from the clock: a share of the remaining time plus
+    most of the increment, never the whole clock"""
+    side = 'w' if board.turn == chess.WHITE else 'b'
+    remaining = params.get(f'{side}time')
+    if remaining is None:
+        return None
+    increment = params.get(f'{side}inc', 0)
+    moves_to_go = params.get('movestogo', 30)
+    return max(1, min(remaining // max(moves_to_go, 1) + increment * 3 // 4, remaining - 50))
+
+
+class UCIEngine:
+    """Reads UCI commands and writes replies through output (print by default)"""
+
+    def __init__(self, output=None):
+        self.output = output or self._print
+        self.engine = ENGINES[0]
+        self.hash_mb = DEFAULT_HASH_MB
+        self.threads = 1
+        self.tt = TranspositionTable(self.hash_mb)
+        self.board = EvalBoard()
+        self.position = (chess.STARTING_FEN, [])
+        self.search_thread = None
+        self.stop_event = threading.Event()
+        # True from go until bestmove is written; guarded by lock
+        self.searching = False
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _print(line):
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    def run(self, lines=None):
+        for line in lines if lines is not None else sys.stdin:
+            if not self.handle(line):
+                break
+        self.stop()
+
+    def handle(self, line):
+        """Process one command line; returns False on quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command in ('ucinewgame', 'setoption', 'position', 'go') and self.is_searching():
+            self.output(f'info string {command} ignored while searching')
+            return True
+        if command == 'uci':
+            self.output(f'id name {ENGINE_NAME}')
+            self.output('id author Chess Website')
+            self.output(f'option name Hash type spin default {DEFAULT_HASH_MB} min 1 max {MAX_HASH_MB}')
+            self.output(f'option name Threads type spin default 1 min 1 max {SEARCH_WORKERS}')
+            self.output(f'option name Engine type combo default {ENGINES[0]} '
+                        + ' '.join(f'var {engine}' for engine in ENGINES))
+            self.output('uciok')
+        elif command == 'isready':
+            self.output('readyok')
+        elif command == 'ucinewgame':
+            self.wait()
+            self.tt.clear()
+            self.set_position(chess.STARTING_FEN, [])
+        elif command == 'setoption':
+            self.set_option(args)
+        elif command == 'position':
+            self.parse_position(args)
+        elif command == 'go':
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'quit':
+            return False
+        return True
+
+    def set_option(self, args):
+        text = ' '.join(args)
+        name, _, value = text.partition(' value ')
+        name = name.replace('name', '', 1).strip().lower()
+        if name == 'hash':
+            self.hash_mb = max(1, min(int(value), MAX_HASH_MB))
+            self.tt = TranspositionTable(self.hash_mb)
+        elif name == 'threads':
+            self.threads = max(1, min(int(value), SEARCH_WORKERS))
+        elif name == 'engine' and value.strip() in ENGINES:
+            self.engine = value.strip()
+
+    def parse_position(self, args):
+        if 'moves' in args:
+            split = args.index('moves')
+            setup, moves = args[:split], args[split + 1:]
+        else:
+            setup, moves = args, []
+        fen = chess.STARTING_FEN if setup[:1] == ['startpos'] else ' '.join(setup[1:])
+        self.set_position(fen, moves)
+
+    def set_position(self, fen, moves):
+        """Update the board, only pushing the new moves when the position
+        continues the previous one (the usual case during a game)"""
+        previous_fen, previous_moves = self.position
+        if fen == previous_fen and moves[:len(previous_moves)] == previous_moves:
+            new_moves = moves[len(previous_moves):]
+        else:
+            self.board = EvalBoard(fen)
+            new_moves = moves
+        for uci in new_moves:
+            self.board.push_uci(uci)
+        self.position = (fen, list(moves))
+
+    def is_searching(self):
+        with self.lock:
+            return self.searching
+
+    def go(self, args):
+        self.wait()
+        params = {}
+        index = 0
+        while index < len(args):
+            name = args[index]
+            if name in ('infinite', 'ponder'):
+                params[name] = True
+                index += 1
+            elif index + 1 < len(args):
+                try:
+                    params[name] = int(args[index + 1])
+                except ValueError:
+                    pass
+                index += 2
+            else:
+                index += 1
+        self.stop_event = threading.Event()
+        self.searching = True
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(), params, self.stop_event),
+                                              name='uci-search', daemon=True)
+        self.search_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wait()
+
+    def wait(self):
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+    def info(self, board, depth, move, score, ctx):
+        elapsed_ms = max(1, round(ctx.elapsed_ms()))
+        pv = principal_variation(board, self.tt, depth) or ([move] if move else [])
+        self.output(f'info depth {depth} score {format_score(score, board)} nodes {ctx.nodes} '
+                    f'nps {ctx.nodes * 1000 // elapsed_ms} time {elapsed_ms} pv '
+                    + ' '.join(pv_move.uci() for pv_move in pv))
+
+    def search(self, board, params, stop_event):
+        infinite = params.get('infinite') or params.get('ponder')
+        movetime_ms = params.get('movetime') or (None if infinite else time_budget_ms(board, params))
+        max_nodes = params.get('nodes')
+        depth = params.get('depth') or MAX_SEARCH_DEPTH
+        ctx = SearchContext(movetime_ms=movetime_ms, max_nodes=max_nodes, cancel_event=stop_event)
+        self.tt.new_search()
+        move = None
+        try:
+            if self.engine == 'minimax':
+                move, score = minimax(board, params.get('depth', 3), board.turn == chess.WHITE, ctx=ctx)
+                self.info(board, params.get('depth', 3), move, score, ctx)
+            elif self.threads > 1 and movetime_ms is None and max_nodes is None:
+                # Root split over the process pool; stop abandons the depth in progress
+                for current in range(1, depth + 1):
+                    move, score, nodes = parallel_search(board, current, self.threads, self.engine, stop_event)
+                    ctx.nodes += nodes
+                    self.info(board, current, move, score, ctx)
+                    if move is None:
+                        break
+            else:
+                def report(current, iteration_move, score, ctx):
+                    self.info(board, current, iteration_move, score, ctx)
+                move, _, _ = iterative_deepening(board, depth, tt=self.tt, ctx=ctx, engine=self.engine,
+                                                 on_iteration=report)
+        except SearchAborted:
+            pass
+        if infinite:
+            # UCI: after go infinite, bestmove only follows stop
+            stop_event.wait()
+        if move is None and not board.is_game_over():
+            move = next(iter(board.legal_moves))
+        with self.lock:
+            # Cleared before bestmove goes out so the GUI's next position is accepted
+            self.searching = False
+            self.output(f'bestmove {move.uci() if move else "0000"}')
+
+
+def main():
+    UCIEngine().run()
+
+
+if __name__ == '__main__':
+    main()